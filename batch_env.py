@@ -0,0 +1,297 @@
+"""
+向量化批量模拟
+
+用 NumPy 的“数组结构”(struct-of-arrays) 同时保存 N 局游戏的状态，
+每一步对所有对局做向量化的物理、碰撞和计分，规则与 sim.py 中的
+Bird.update 以及 Simulation.step 完全一致。
+用于调整 gap、gravity、jump_strength、pipe_frequency、difficulty_interval 等参数，
+需要模拟的对局数量远多于一个窗口能玩的数量。
+
+接口与 gym 的向量环境类似:
+    env = BatchEnv(4096, seed=0)
+    obs = env.reset()
+    obs, rewards, dones, info = env.step(actions)
+
+用法:
+    python batch_env.py --envs 4096 --steps 2000   # 测试批量模拟速度
+    python batch_env.py --verify                   # 与 sim.Simulation 逐帧对比
+"""
+import argparse
+import time
+
+import numpy as np
+
+from sim import GAME_WIDTH, SCREEN_HEIGHT, TICKS_PER_SECOND, SimConfig, Simulation, pipe_capacity
+
+# 观测值的维度: (小鸟y, 小鸟速度, 到下一对水管的水平距离, 空隙上沿, 空隙下沿)
+OBSERVATION_SIZE = 5
+
+
+class BatchEnv:
+    """N 局并行的 Flappy Bird"""
+
+    def __init__(self, num_envs, config=None, seed=None, auto_reset=True):
+        self.num_envs = num_envs
+        self.config = config or SimConfig()
+        if self.config.num_birds != 1:
+            raise ValueError("BatchEnv 只支持单只小鸟")
+        self.rng = np.random.default_rng(seed)
+        self.auto_reset = auto_reset
+        self.capacity = pipe_capacity(self.config)
+
+        n, p = num_envs, self.capacity
+        # 小鸟
+        self.bird_y = np.zeros(n)
+        self.bird_velocity = np.zeros(n)
+        self.bird_angle = np.zeros(n, dtype=np.int64)
+        # 对局
+        self.score = np.zeros(n, dtype=np.int64)
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.alive = np.zeros(n, dtype=bool)
+        self.pipe_timer = np.zeros(n)
+        self.pipe_frequency = np.zeros(n)
+        self.base_speed = np.zeros(n)
+        # 水管，与 Simulation 相同：每局一个 capacity 个槽位的环形缓冲区，位置由共同的滚动距离决定，
+        # pipe_head / pipe_next / pipe_end 分别为第一个未移除、未通过、未生成的水管序号
+        self.scroll = np.zeros(n)
+        self.scroll_speed = np.zeros(n)
+        self.pipe_offset = np.zeros((n, p))
+        self.pipe_top = np.zeros((n, p), dtype=np.int64)
+        self.pipe_head = np.zeros(n, dtype=np.int64)
+        self.pipe_next = np.zeros(n, dtype=np.int64)
+        self.pipe_end = np.zeros(n, dtype=np.int64)
+
+        self._rows = np.arange(n)
+
+    def reset(self, mask=None):
+        """重置全部对局（或 mask 选中的对局），返回观测值"""
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        config = self.config
+        self.bird_y[mask] = SCREEN_HEIGHT // 2
+        self.bird_velocity[mask] = 0
+        self.bird_angle[mask] = 0
+        self.score[mask] = 0
+        self.tick[mask] = 0
+        self.alive[mask] = True
+        self.pipe_timer[mask] = 0
+        self.pipe_frequency[mask] = config.pipe_frequency
+        self.base_speed[mask] = config.base_speed
+        self.scroll[mask] = 0
+        self.scroll_speed[mask] = config.pipe_speed
+        self.pipe_head[mask] = 0
+        self.pipe_next[mask] = 0
+        self.pipe_end[mask] = 0
+        return self.observation()
+
+    def _sample_heights(self, count):
+        """随机生成上方水管高度，与 random.randint 一样包含两端"""
+        config = self.config
+        return self.rng.integers(config.pipe_margin, SCREEN_HEIGHT - config.gap - config.pipe_margin + 1, size=count)
+
+    def step(self, actions):
+        """
+        所有对局推进一个逻辑帧
+        返回 (observation, rewards, dones, info)，rewards 为本步得分，dones 为本步结束的对局。
+        auto_reset 为 True 时，结束的对局在下一步开始前自动重置，
+        info["final_score"] 中保存它们结束时的分数（未结束为 -1）。
+        """
+        config = self.config
+        actions = np.asarray(actions, dtype=bool)
+        if self.auto_reset and not self.alive.all():
+            self.reset(~self.alive)
+        running = self.alive.copy()
+        rows = self._rows
+
+        # 跳跃
+        jump = running & actions
+        self.bird_velocity[jump] = config.jump_strength
+        self.bird_angle[jump] = config.max_angle
+
+        # 小鸟物理
+        velocity = self.bird_velocity
+        velocity[running] += config.gravity
+        self.bird_y[running] += velocity[running]
+        rising = velocity < 0
+        self.bird_angle[:] = np.where(
+            running,
+            np.where(rising,
+                     np.minimum(config.max_angle, self.bird_angle + config.rotation_speed),
+                     np.maximum(config.min_angle, self.bird_angle - config.rotation_speed)),
+            self.bird_angle)
+        above = running & (self.bird_y < 0)
+        self.bird_y[above] = 0
+        velocity[above] = 0
+        self.tick[running] += 1
+
+        # 生成新水管
+        current_time = self.tick * 1000 / TICKS_PER_SECOND
+        elapsed = current_time - self.pipe_timer
+        no_pipes = self.pipe_head == self.pipe_end
+        waiting = no_pipes & (elapsed < config.initial_delay)
+        spawn = running & ~waiting & (elapsed > self.pipe_frequency)
+        if spawn.any():
+            spawn_rows = rows[spawn]
+            if (self.pipe_end[spawn_rows] - self.pipe_head[spawn_rows] >= self.capacity).any():
+                raise RuntimeError("水管槽位不足")
+            slots = self.pipe_end[spawn_rows] % self.capacity
+            self.pipe_offset[spawn_rows, slots] = self.scroll[spawn_rows]
+            self.pipe_top[spawn_rows, slots] = self._sample_heights(len(spawn_rows))
+            self.pipe_end[spawn_rows] += 1
+            self.pipe_timer[spawn] = current_time[spawn]
+
+        # 所有水管一起移动
+        self.scroll[running] += self.scroll_speed[running]
+
+        # 碰撞检测只检查尚未通过、且左边缘在小鸟右边缘之前的水管，
+        # 与 pygame.Rect.colliderect 一样使用截断后的整数坐标
+        bird_left = int(config.bird_x)
+        bird_top = np.trunc(self.bird_y).astype(np.int64)
+        bird_width = config.bird_width
+        bird_height = config.bird_height
+        hit_pipe = np.zeros(self.num_envs, dtype=bool)
+        index = self.pipe_next.copy()
+        while True:
+            pipe_left = np.trunc(self.pipe_x(index)).astype(np.int64)
+            near = running & (index < self.pipe_end) & (pipe_left < bird_left + bird_width)
+            if not near.any():
+                break
+            top = self.pipe_top[rows, index % self.capacity]
+            bottom_height = SCREEN_HEIGHT - top - config.gap
+            overlap_x = (bird_left < pipe_left + config.pipe_width) & (pipe_left < bird_left + bird_width)
+            hit_top = overlap_x & (top > 0) & (bird_top < top) & (0 < bird_top + bird_height)
+            hit_bottom = overlap_x & (bottom_height > 0) & \
+                (bird_top < SCREEN_HEIGHT) & (SCREEN_HEIGHT - bottom_height < bird_top + bird_height)
+            hit_pipe |= near & (hit_top | hit_bottom)
+            index += near
+
+        # 检测小鸟是否通过水管，一帧内通过多个水管时逐个计分
+        scored = np.zeros(self.num_envs, dtype=np.int64)
+        while True:
+            passing = running & (self.pipe_next < self.pipe_end) & \
+                (self.pipe_x(self.pipe_next) + config.pipe_width < config.bird_x)
+            if not passing.any():
+                break
+            self.pipe_next += passing
+            self.score += passing
+            scored += passing
+
+            # 根据分数增加难度
+            ramp = passing & (self.score % config.difficulty_interval == 0)
+            if ramp.any():
+                self.base_speed[ramp] += config.speed_step
+                self.scroll_speed[ramp] = self.base_speed[ramp]
+                self.pipe_frequency[ramp] = np.maximum(
+                    config.min_pipe_frequency,
+                    config.ramp_pipe_frequency
+                    - (self.score[ramp] // config.difficulty_interval) * config.pipe_frequency_step)
+
+        # 移除超出屏幕的水管
+        while True:
+            gone = running & (self.pipe_head < self.pipe_next) & \
+                (self.pipe_x(self.pipe_head) + config.pipe_width < 0)
+            if not gone.any():
+                break
+            self.pipe_head += gone
+
+        # 检测小鸟是否落地
+        hit_ground = running & (self.bird_y + bird_height >= SCREEN_HEIGHT - config.ground_height)
+
+        dones = running & (hit_pipe | hit_ground)
+        self.alive[dones] = False
+        info = {
+            "hit_pipe": hit_pipe,
+            "hit_ground": hit_ground,
+            "final_score": np.where(dones, self.score, -1),
+        }
+        return self.observation(), scored.astype(np.float64), dones, info
+
+    def pipe_x(self, index):
+        """每局第 index[i] 个生成的水管的左边缘位置"""
+        return GAME_WIDTH - (self.scroll - self.pipe_offset[self._rows, index % self.capacity])
+
+    def observation(self):
+        """所有对局的观测值，形状为 (num_envs, OBSERVATION_SIZE)，含义与 Simulation.observation 相同"""
+        config = self.config
+        # 前方最近的水管就是第一个未通过的水管
+        has_pipe = self.pipe_next < self.pipe_end
+        obs = np.empty((self.num_envs, OBSERVATION_SIZE))
+        obs[:, 0] = self.bird_y
+        obs[:, 1] = self.bird_velocity
+        obs[:, 2] = np.where(has_pipe, self.pipe_x(self.pipe_next) - config.bird_x, GAME_WIDTH)
+        top = self.pipe_top[self._rows, self.pipe_next % self.capacity]
+        obs[:, 3] = np.where(has_pipe, top, 0)
+        obs[:, 4] = np.where(has_pipe, top + config.gap, SCREEN_HEIGHT)
+        return obs
+
+
+class _SequenceRandom:
+    """按给定顺序返回水管高度，用于让 Simulation 与 BatchEnv 生成相同的水管"""
+
+    def __init__(self, heights):
+        self.heights = iter(heights)
+
+    def randint(self, a, b):
+        return int(next(self.heights))
+
+
+def verify(episodes, seed):
+    """逐帧对比 BatchEnv 与 Simulation 的状态，返回对比的总步数"""
+    config = SimConfig()
+    rng = np.random.default_rng(seed)
+    total_steps = 0
+    for episode in range(episodes):
+        heights = rng.integers(config.pipe_margin, SCREEN_HEIGHT - config.gap - config.pipe_margin + 1, size=10000)
+        sim = Simulation(config, _SequenceRandom(heights))
+        env = BatchEnv(1, config, auto_reset=False)
+        env_heights = iter(heights)
+        env._sample_heights = lambda count: np.array([next(env_heights) for _ in range(count)])
+        env.reset()
+
+        # 简单的规则策略加一些随机扰动，让对局能持续较长时间
+        while not sim.done:
+            y, velocity, _, _, gap_bottom = sim.observation()
+            ground = SCREEN_HEIGHT - config.ground_height
+            action = (y + config.bird_height > min(gap_bottom, ground) - 45 and velocity >= 0) \
+                or rng.random() < 0.01
+            result = sim.step(action)
+            obs, rewards, dones, _ = env.step([action])
+            total_steps += 1
+
+            expected = np.array(sim.observation())
+            if not np.allclose(obs[0], expected) or rewards[0] != result.scored \
+                    or dones[0] != result.crashed or env.score[0] != sim.score:
+                raise AssertionError(f"第 {episode} 局第 {sim.tick} 帧不一致: {obs[0]} != {expected}")
+    return total_steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量化批量模拟")
+    parser.add_argument("--envs", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--jump-probability", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", action="store_true", help="与 sim.Simulation 逐帧对比")
+    parser.add_argument("--episodes", type=int, default=20, help="--verify 对比的对局数")
+    args = parser.parse_args()
+
+    if args.verify:
+        steps = verify(args.episodes, args.seed)
+        print(f"{args.episodes} 局共 {steps} 步与 Simulation 完全一致")
+        return
+
+    env = BatchEnv(args.envs, seed=args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    finished = []
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, dones, info = env.step(rng.random(args.envs) < args.jump_probability)
+        finished.extend(info["final_score"][dones])
+    elapsed = time.perf_counter() - start
+    print(f"{args.envs} 局并行 x {args.steps} 步, 结束 {len(finished)} 局, "
+          f"{args.envs * args.steps / elapsed:,.0f} 步/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+性能基准测试
+
+用法:
+    python bench.py convert             # 相机画面转换为 Surface 的耗时对比
+    python bench.py gesture             # 手势识别流程的吞吐量与各阶段耗时（默认使用合成画面）
+    python bench.py gesture --source clip.mp4 --detector mediapipe
+    python bench.py latency             # 从挥手开始到触发跳跃的延迟分布（合成画面）
+"""
+import argparse
+import itertools
+import os
+import time
+
+# 基准测试不需要真正的窗口和声卡
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import cv2
+import numpy as np
+import pygame
+
+import game
+from camera import CAMERA_STAGES, HAND_DETECTORS, INFERENCE_WIDTH, Camera
+from frame_source import SyntheticSource, open_source
+from profiler import LatencyHistogram
+
+
+def legacy_convert_to_surface(frame):
+    """旧的转换方式：再次转换颜色，旋转、翻转后每帧创建新的 Surface"""
+    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame = np.rot90(frame)
+    frame = np.flipud(frame)
+    return pygame.surfarray.make_surface(frame)
+
+
+def measure(func, iterations):
+    """运行 func 若干次，返回每次调用的耗时列表（毫秒）"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = np.asarray(timings)
+    print(f"{name:<26} mean {timings.mean():7.3f} ms   p50 {np.percentile(timings, 50):7.3f} ms   "
+          f"p95 {np.percentile(timings, 95):7.3f} ms")
+
+
+def bench_convert(args):
+    """对比旧的 convert_to_surface 与 FrameConverter"""
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (game.SCREEN_HEIGHT, game.CAMERA_WIDTH, 3), dtype=np.uint8)
+              for _ in range(8)]
+    converter = game.FrameConverter()
+
+    # 两种方式的结果必须一致
+    expected = pygame.surfarray.array3d(legacy_convert_to_surface(frames[0]))
+    actual = pygame.surfarray.array3d(converter.convert(frames[0]))
+    assert np.array_equal(expected, actual), "FrameConverter 的输出与旧实现不一致"
+
+    frame_cycle = itertools.cycle(frames)
+    # 预热
+    for frame in frames:
+        legacy_convert_to_surface(frame)
+        converter.convert(frame)
+
+    print(f"画面尺寸 {game.CAMERA_WIDTH}x{game.SCREEN_HEIGHT}，每种方式 {args.iterations} 次")
+    report("legacy convert_to_surface", measure(lambda: legacy_convert_to_surface(next(frame_cycle)), args.iterations))
+    report("FrameConverter.convert", measure(lambda: converter.convert(next(frame_cycle)), args.iterations))
+
+
+def bench_gesture(args):
+    """以最快速度对离线画面运行 capture_frame（含 detect_wave_gesture），统计吞吐量、各阶段耗时和跳跃次数"""
+    width, height = game.CAMERA_WIDTH, game.SCREEN_HEIGHT
+    if args.source == "synthetic":
+        source = SyntheticSource(width, height, num_frames=args.frames + args.warmup)
+    else:
+        source = open_source(args.source, width, height, loop=False)
+    if not source.is_opened():
+        raise SystemExit(f"无法打开画面来源 {args.source}")
+    if source.is_device:
+        print(f"相机采集模式: {source.mode}")
+    camera = Camera(width, height, inference_width=args.inference_width, use_roi=not args.no_roi,
+                    detect_interval=args.detect_interval, adaptive_cadence=args.adaptive_cadence,
+                    source=source, hand_detector=args.detector)
+
+    stages = {}
+    frames = 0
+    jumps = 0
+    elapsed = 0.0
+    start_timestamp = None  # 第一帧计入结果的画面时间戳
+    try:
+        while frames < args.frames:
+            start = time.perf_counter()
+            _, jump_triggered = camera.capture_frame()
+            frame_time = time.perf_counter() - start
+            if "read" not in camera.stage_times:
+                break  # 画面来源已经读完
+            if args.warmup > 0:
+                # 预热阶段（模型加载等）不计入结果
+                args.warmup -= 1
+                continue
+            if start_timestamp is None:
+                start_timestamp = camera.frame_timestamp
+            frames += 1
+            elapsed += frame_time
+            jumps += jump_triggered
+            for stage, seconds in camera.stage_times.items():
+                stages.setdefault(stage, []).append(seconds * 1000)
+    finally:
+        camera.release()
+
+    if frames == 0:
+        raise SystemExit("没有可用的画面")
+    print(f"来源 {args.source}, 检测器 {args.detector}, {frames} 帧, {frames / elapsed:.1f} 帧/秒")
+    for stage in CAMERA_STAGES:
+        if stage in stages:
+            report(stage, stages[stage])
+    if isinstance(source, SyntheticSource):
+        waves = source.waves_until(camera.frame_timestamp) - source.waves_until(start_timestamp)
+        print(f"跳跃 {jumps} 次, 合成画面中的挥手 {waves} 次")
+    else:
+        print(f"跳跃 {jumps} 次")
+
+
+def format_percentiles(histogram):
+    stats = histogram.percentiles()
+    if not stats:
+        return "没有样本"
+    return ", ".join(f"{name[:-3]} {value:.1f} ms" for name, value in stats.items())
+
+
+def bench_latency(args):
+    """
+    自动测量挥手到跳跃的延迟
+    延迟 = 触发跳跃的画面时间戳 - 挥手开始的时刻（画面时间，包含采集帧间隔、3帧窗口与冷却时间）
+         + 处理该帧的实际耗时（读取、识别与手势判断）
+    合成画面知道每次挥手开始的准确时刻；其他来源没有这个信息，只统计处理耗时。
+    游戏中跳跃还要等到下一个逻辑帧（最多 1/60 秒）才生效，不计入这里的结果。
+    """
+    width, height = game.CAMERA_WIDTH, game.SCREEN_HEIGHT
+    if args.source == "synthetic":
+        num_frames = int(args.waves * args.wave_interval * args.camera_fps)
+        source = SyntheticSource(width, height, fps=args.camera_fps, wave_interval=args.wave_interval,
+                                 num_frames=num_frames)
+    else:
+        source = open_source(args.source, width, height, loop=False)
+    if not source.is_opened():
+        raise SystemExit(f"无法打开画面来源 {args.source}")
+    if source.is_device:
+        print(f"相机采集模式: {source.mode}")
+    camera = Camera(width, height, inference_width=args.inference_width, use_roi=not args.no_roi,
+                    detect_interval=args.detect_interval, adaptive_cadence=args.adaptive_cadence,
+                    source=source, hand_detector=args.detector)
+
+    synthetic = isinstance(source, SyntheticSource)
+    total = LatencyHistogram()
+    window = LatencyHistogram()
+    processing = LatencyHistogram()
+    try:
+        while True:
+            start = time.perf_counter()
+            _, jump_triggered = camera.capture_frame()
+            elapsed = time.perf_counter() - start
+            if "read" not in camera.stage_times:
+                break  # 画面来源已经读完
+            if not jump_triggered:
+                continue
+            processing.record(elapsed)
+            if synthetic:
+                delay = camera.frame_timestamp - source.wave_start(camera.frame_timestamp)
+                window.record(delay)
+                total.record(delay + elapsed)
+    finally:
+        camera.release()
+
+    print(f"来源 {args.source}, 检测器 {args.detector}, 相机帧率 {getattr(source, 'fps', 0):.0f}")
+    if synthetic:
+        waves = source.waves_until(camera.frame_timestamp)
+        print(f"挥手 {waves} 次, 触发跳跃 {total.count} 次")
+        print("等待画面与手势窗口:", format_percentiles(window))
+        print("处理耗时:", format_percentiles(processing))
+        print("挥手开始 → 触发跳跃:")
+        print(total.format())
+    else:
+        print(f"触发跳跃 {processing.count} 次，处理耗时（画面采集 → 触发跳跃）:")
+        print(processing.format())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flappy Bird 性能基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="相机画面转换为 Surface 的耗时对比")
+    convert_parser.add_argument("--iterations", type=int, default=500)
+    convert_parser.set_defaults(func=bench_convert)
+
+    gesture_parser = subparsers.add_parser("gesture", help="手势识别流程的吞吐量与各阶段耗时")
+    gesture_parser.add_argument("--source", default="synthetic",
+                                help="画面来源: synthetic、视频文件或图片目录")
+    gesture_parser.add_argument("--detector", choices=HAND_DETECTORS, default=None,
+                                help="手部检测器，合成画面默认使用 marker，其他来源默认使用 mediapipe")
+    gesture_parser.add_argument("--frames", type=int, default=600)
+    gesture_parser.add_argument("--warmup", type=int, default=10, help="不计入结果的预热帧数")
+    gesture_parser.add_argument("--inference-width", type=int, default=INFERENCE_WIDTH)
+    gesture_parser.add_argument("--no-roi", action="store_true")
+    gesture_parser.add_argument("--detect-interval", type=int, default=1)
+    gesture_parser.add_argument("--adaptive-cadence", action="store_true")
+    gesture_parser.set_defaults(func=bench_gesture)
+
+    latency_parser = subparsers.add_parser("latency", help="挥手到触发跳跃的延迟分布")
+    latency_parser.add_argument("--source", default="synthetic",
+                                help="画面来源: synthetic、视频文件或图片目录")
+    latency_parser.add_argument("--detector", choices=HAND_DETECTORS, default=None,
+                                help="手部检测器，合成画面默认使用 marker，其他来源默认使用 mediapipe")
+    latency_parser.add_argument("--waves", type=int, default=100, help="合成画面中的挥手次数")
+    latency_parser.add_argument("--wave-interval", type=float, default=1.0, help="合成画面中两次挥手的间隔（秒）")
+    latency_parser.add_argument("--camera-fps", type=float, default=30.0, help="合成画面的帧率")
+    latency_parser.add_argument("--inference-width", type=int, default=INFERENCE_WIDTH)
+    latency_parser.add_argument("--no-roi", action="store_true")
+    latency_parser.add_argument("--detect-interval", type=int, default=1)
+    latency_parser.add_argument("--adaptive-cadence", action="store_true")
+    latency_parser.set_defaults(func=bench_latency)
+
+    args = parser.parse_args()
+    if getattr(args, "detector", "") is None:
+        args.detector = "marker" if args.source == "synthetic" else "mediapipe"
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,763 @@
+import functools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame_source import MARKER_COLOR, DeviceSource, FrameSource, open_source
+
+# 本模块只依赖 OpenCV / Mediapipe，不导入 pygame，
+# 因此既可以在游戏主进程中使用，也可以在独立的检测进程中使用
+
+
+@functools.lru_cache(maxsize=None)
+def mediapipe_solutions():
+    """
+    延迟导入Mediapipe（需要约1秒），只有真正创建手部检测器的线程或进程才会加载
+    返回 mp.solutions，其中 hands 为手部检测
+    """
+    import mediapipe as mp
+    return mp.solutions
+
+# 相机画面尺寸，与游戏右侧相机区域一致
+FRAME_WIDTH = 400
+FRAME_HEIGHT = 600
+
+# 每只手的关键点数量
+NUM_LANDMARKS = 21
+
+# 手部识别的默认输入宽度（高度按画面比例计算），识别不需要与显示相同的分辨率
+INFERENCE_WIDTH = 200
+# 跟踪到手之后只识别手部附近的区域：裁剪区域为关键点包围盒放大 ROI_SCALE 倍，
+# 挥手时手移动很快，需要留出足够余量；边长不小于 ROI_MIN_SIZE 像素
+ROI_SCALE = 2.5
+ROI_MIN_SIZE = 160
+
+# 两次完整识别之间用金字塔LK光流跟踪食指根部关键点（5号点）
+TRACKED_LANDMARK = 5
+LK_PARAMS = dict(
+    winSize=(21, 21),
+    maxLevel=3,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+)
+# 正反向光流误差超过该值（像素）时认为跟踪失败
+MAX_TRACKING_ERROR = 2.0
+# 手部识别置信度低于该值时，下一帧必须重新运行完整识别
+MIN_HAND_SCORE = 0.8
+# 自适应间隔时每帧的处理预算（秒）
+FRAME_BUDGET = 1 / 60
+
+# capture_frame 记录耗时的处理阶段：读取画面、翻转缩放、检测（含光流跟踪）、
+# 其中 Mediapipe 推理本身（含颜色转换）、挥手判断
+CAMERA_STAGES = ("read", "preprocess", "detect", "inference", "gesture")
+
+# 手部关键点之间的连线，与 mediapipe.solutions.hands.HAND_CONNECTIONS 相同，
+# 游戏绘制叠加层时使用，不需要导入Mediapipe
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),          # 拇指
+    (0, 5), (5, 6), (6, 7), (7, 8),          # 食指
+    (5, 9), (9, 10), (10, 11), (11, 12),     # 中指
+    (9, 13), (13, 14), (14, 15), (15, 16),   # 无名指
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # 小指与手掌
+)
+
+# 挥手判断的最小移动距离（像素），游戏的叠加层用它显示当前移动距离与阈值的对比
+MIN_GESTURE_DISTANCE = 50
+
+# 多人模式最多的玩家数（游戏中有红、蓝、黄三种小鸟），共享内存按此预留每名玩家的关键点
+MAX_PLAYERS = 3
+# 多人模式下，手与上一帧某名玩家的位置相距不超过该值（像素）时仍分配给这名玩家
+TRACK_MAX_DISTANCE = 120
+
+
+# 可选的手部检测器: mediapipe 识别真实的手，marker 只按颜色寻找合成画面中的标记
+HAND_DETECTORS = ("mediapipe", "marker")
+# marker 检测器允许的颜色偏差
+MARKER_TOLERANCE = 60
+
+
+class MarkerResults:
+    """与 Mediapipe 识别结果相同结构的返回值"""
+
+    def __init__(self, hand_landmarks=(), handedness=None):
+        if not hand_landmarks:
+            self.multi_hand_landmarks = None
+            self.multi_handedness = None
+        else:
+            self.multi_hand_landmarks = list(hand_landmarks)
+            self.multi_handedness = [handedness] * len(hand_landmarks)
+
+
+class MarkerDetector:
+    """
+    按颜色分割寻找合成画面中的标记，接口与 Mediapipe 的 Hands 相同
+    21个关键点都放在标记中心，用于在没有真实手部画面时测试整条手势识别流程
+    max_num_hands 大于1时按连通区域分别寻找多个标记，面积大的优先
+    """
+
+    def __init__(self, color=MARKER_COLOR, tolerance=MARKER_TOLERANCE, max_num_hands=1):
+        self.max_num_hands = max_num_hands
+        # 输入为RGB图像，标记颜色按BGR定义
+        rgb = np.array(color[::-1], dtype=np.int16)
+        self.lower = np.clip(rgb - tolerance, 0, 255).astype(np.uint8)
+        self.upper = np.clip(rgb + tolerance, 0, 255).astype(np.uint8)
+
+        # 结果使用Mediapipe的关键点格式，在创建检测器时才导入
+        from mediapipe.framework.formats import classification_pb2, landmark_pb2
+        self.landmark_pb2 = landmark_pb2
+        # 标记的置信度固定为1
+        self.handedness = classification_pb2.ClassificationList()
+        self.handedness.classification.add(index=0, score=1.0, label="Marker")
+
+    def process(self, image):
+        mask = cv2.inRange(image, self.lower, self.upper)
+        height, width = mask.shape
+        if self.max_num_hands == 1:
+            moments = cv2.moments(mask, binaryImage=True)
+            if moments["m00"] == 0:
+                return MarkerResults()
+            centers = [(moments["m10"] / moments["m00"], moments["m01"] / moments["m00"])]
+        else:
+            count, _, stats, centroids = cv2.connectedComponentsWithStats(mask)
+            # 第0个连通区域是背景
+            largest = sorted(range(1, count), key=lambda i: -stats[i, cv2.CC_STAT_AREA])
+            centers = [tuple(centroids[i]) for i in largest[:self.max_num_hands]]
+        hands = []
+        for x, y in centers:
+            hand_landmarks = self.landmark_pb2.NormalizedLandmarkList()
+            for _ in range(NUM_LANDMARKS):
+                hand_landmarks.landmark.add(x=x / width, y=y / height, z=0.0)
+            hands.append(hand_landmarks)
+        return MarkerResults(hands, self.handedness)
+
+    def close(self):
+        pass
+
+
+def landmark_array(hand_landmarks):
+    """把Mediapipe关键点转换为 (NUM_LANDMARKS, 3) 的归一化坐标数组"""
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+
+
+def create_hands(detector="mediapipe", max_num_hands=1):
+    """创建手部检测器，max_num_hands 为一次识别最多返回的手数"""
+    if detector == "marker":
+        return MarkerDetector(max_num_hands=max_num_hands)
+    return mediapipe_solutions().hands.Hands(
+        static_image_mode=False,
+        max_num_hands=max_num_hands,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+class DetectionCadence:
+    """
+    决定每一帧是运行完整的Mediapipe识别，还是只做光流跟踪
+    max_interval 为两次完整识别之间最多间隔的帧数，1 表示每帧都识别。
+    adaptive 为 True 时根据实测耗时调整间隔 N：
+    平均每帧耗时 (识别耗时 + (N-1) * 跟踪耗时) / N 不超过 frame_budget。
+    """
+    def __init__(self, max_interval=1, adaptive=False, frame_budget=FRAME_BUDGET):
+        self.max_interval = max(1, max_interval)
+        self.adaptive = adaptive
+        self.frame_budget = frame_budget
+        self.interval = 1 if adaptive else self.max_interval
+        self.frames_since_detection = 0
+        self.detect_time = None  # 完整识别耗时的滑动平均（秒）
+        self.track_time = None  # 光流跟踪耗时的滑动平均（秒）
+
+    @property
+    def enabled(self):
+        return self.max_interval > 1
+
+    def should_detect(self):
+        return self.frames_since_detection + 1 >= self.interval
+
+    def record(self, detected, elapsed):
+        """记录一帧的处理方式和耗时，并更新间隔"""
+        if detected:
+            self.frames_since_detection = 0
+            self.detect_time = _smooth(self.detect_time, elapsed)
+        else:
+            self.frames_since_detection += 1
+            self.track_time = _smooth(self.track_time, elapsed)
+
+        if self.adaptive and self.detect_time is not None:
+            track_time = self.track_time or 0.0
+            if self.detect_time <= self.frame_budget:
+                interval = 1
+            elif track_time >= self.frame_budget:
+                interval = self.max_interval
+            else:
+                interval = math.ceil((self.detect_time - track_time) / (self.frame_budget - track_time))
+            self.interval = min(max(interval, 1), self.max_interval)
+
+    def reset(self):
+        """丢失跟踪后，下一帧立即运行完整识别"""
+        self.frames_since_detection = self.interval
+
+
+def _smooth(average, value, alpha=0.1):
+    """指数滑动平均"""
+    return value if average is None else average + alpha * (value - average)
+
+
+def probe_cameras(indices):
+    """并行尝试打开多个相机，返回 {索引: DeviceSource}，只包含成功打开的相机"""
+    indices = list(indices)
+    with ThreadPoolExecutor(max_workers=len(indices)) as pool:
+        sources = list(pool.map(DeviceSource, indices))
+    opened = {}
+    for index, source in zip(indices, sources):
+        if source.is_opened():
+            opened[index] = source
+        else:
+            source.release()
+    return opened
+
+
+# 没有可用相机时重新查找的间隔（秒），每次失败后加倍，直到上限
+RECONNECT_DELAY_MIN = 0.5
+RECONNECT_DELAY_MAX = 8.0
+
+
+class CameraSupervisor:
+    """
+    在后台线程中查找、连接和切换实体相机。
+    打开相机可能阻塞数百毫秒，这些操作全部在这里完成，打开成功后由 Camera 通过 take() 非阻塞地取走。
+    没有可用相机时按退避间隔重复查找，因此相机断开或稍后才插入时会自动连接。
+    """
+
+    def __init__(self, max_index):
+        self.max_index = max_index
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._request = None  # 待处理的请求 ("connect", 优先索引) 或 ("switch", 当前索引)
+        self._connect = None  # 尚未成功的连接请求，切换失败后继续按退避间隔重试它
+        self._ready = None  # 已经打开、等待取走的 DeviceSource
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="camera-supervisor", daemon=True)
+        self._thread.start()
+
+    def connect(self, preferred=None):
+        """请求连接相机，优先使用 preferred，不可用时使用索引最小的相机，找不到时持续重试"""
+        request = ("connect", preferred)
+        with self._lock:
+            self._connect = request
+        self._submit(request)
+
+    def switch(self, current):
+        """
+        请求切换到 current 之后的下一个可用相机，只尝试一轮
+        之前的连接请求仍未成功时，切换失败后继续重试那次连接
+        """
+        self._submit(("switch", current))
+
+    def _submit(self, request):
+        # 新请求覆盖尚未开始处理的旧请求
+        with self._lock:
+            self._request = request
+        self._wake.set()
+
+    def take(self):
+        """取走已经打开的相机，没有时返回 None"""
+        with self._lock:
+            source, self._ready = self._ready, None
+        return source
+
+    def _run(self):
+        request = None
+        delay = RECONNECT_DELAY_MIN
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+                if self._request is not None:
+                    request, self._request = self._request, None
+                    delay = RECONNECT_DELAY_MIN
+            if request is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            with self._lock:
+                connect = self._connect
+            source = self._open(*request)
+            if source is not None:
+                self._hand_over(source)
+                request = None
+                with self._lock:
+                    if self._connect is connect:  # 期间没有新的连接请求
+                        self._connect = None
+                continue
+            if request[0] == "switch":
+                print("没有找到其他可用的相机")
+                request = connect
+            if request is not None:
+                # 退避后重试，新的请求或 stop() 会立即打断等待
+                self._wake.wait(delay)
+                self._wake.clear()
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    def _open(self, kind, index):
+        """按请求的顺序并行探测相机，返回选中的 DeviceSource，其余的立即释放"""
+        count = self.max_index + 1
+        if kind == "switch" and index is not None:
+            # 当前相机仍在使用，只探测其他索引
+            order = [(index + i) % count for i in range(1, count)]
+        else:
+            order = sorted(range(count), key=lambda i: i != index)
+        opened = probe_cameras(order)
+        choice = next((i for i in order if i in opened), None)
+        for i, source in opened.items():
+            if i != choice:
+                source.release()
+        return opened.get(choice)
+
+    def _hand_over(self, source):
+        with self._lock:
+            if self._running:
+                source, self._ready = self._ready, source
+        # 被替换的旧相机，或 stop() 之后才打开的相机
+        if source is not None:
+            source.release()
+
+    def stop(self):
+        """停止后台线程，不等待正在进行的探测（线程为守护线程，探测结束后自行退出）"""
+        with self._lock:
+            self._running = False
+            source, self._ready = self._ready, None
+        self._wake.set()
+        if source is not None:
+            source.release()
+
+
+class WaveDetector:
+    """一只手的挥手检测状态，多人模式下每名玩家一个"""
+
+    def __init__(self):
+        self.position_history = deque(maxlen=5)  # 减少帧数以更快地检测手势
+        self.last_jump_time = float("-inf")  # 上次跳跃的时间戳
+        self.jump_cooldown = 0.3  # 减少冷却时间使手势检测更频繁
+        self.min_gesture_distance = MIN_GESTURE_DISTANCE  # 降低阈值，增加灵敏度
+        self.is_gesture_detected = False
+
+    @property
+    def position(self):
+        """最近一帧的手部位置，这只手当前没有被检测到时为 None"""
+        return self.position_history[-1] if self.position_history else None
+
+    def update(self, position, timestamp):
+        """加入一帧的手部位置（像素），返回是否触发跳跃"""
+        # 将当前手部位置添加到历史记录
+        self.position_history.append(position)
+        # 如果有足够的历史记录，检测挥手手势
+        if len(self.position_history) >= 3:  # 只需要3帧就开始检测
+            return self.detect_wave_gesture(timestamp)
+        return False
+
+    def clear(self):
+        """没有检测到这只手时清空历史记录"""
+        self.position_history.clear()
+        self.is_gesture_detected = False
+
+    def detect_wave_gesture(self, current_time):
+        """检测挥手手势，返回是否触发跳跃；current_time 为画面自身的时间戳，离线画面以任意速度回放时结果都相同"""
+        # 如果还在冷却时间内，不触发跳跃
+        if current_time - self.last_jump_time < self.jump_cooldown:
+            return False
+
+        # 计算手部位置的移动
+        if len(self.position_history) < 3:  # 确保至少有3个点来计算移动
+            return False
+
+        # 使用最近的几个点来计算移动
+        recent_pos = self.position_history[-3]
+        last_pos = self.position_history[-1]
+
+        # 计算水平和垂直移动距离
+        x_distance = abs(last_pos[0] - recent_pos[0])
+        y_distance = abs(last_pos[1] - recent_pos[1])
+
+        # 计算总移动距离，同时考虑水平和一部分垂直移动
+        # 这样可以让斜向的手势也能触发跳跃
+        total_movement = x_distance + (y_distance * 0.3)
+
+        # 检测是否有足够的移动
+        if total_movement > self.min_gesture_distance and not self.is_gesture_detected:
+            self.is_gesture_detected = True
+            self.last_jump_time = current_time
+            return True
+
+        # 如果手部相对静止，更快地重置手势检测状态
+        if total_movement < self.min_gesture_distance * 0.2:
+            self.is_gesture_detected = False
+
+        return False
+
+
+class Camera:
+    def __init__(self, width=FRAME_WIDTH, height=FRAME_HEIGHT, inference_width=INFERENCE_WIDTH, use_roi=True,
+                 detect_interval=1, adaptive_cadence=False, source=None, hand_detector="mediapipe",
+                 camera_index=None, num_players=1):
+        """
+        source 为画面来源或其描述（见 frame_source.open_source），为 None 时使用实体相机：
+        由 CameraSupervisor 在后台连接，优先使用 camera_index，否则选择索引最小的可用相机
+        hand_detector 为 HAND_DETECTORS 之一
+        num_players 大于1时一次识别最多 num_players 只手，每只手按位置稳定地分配给一名玩家；
+        裁剪区域和光流跟踪只适用于单只手，多人模式下每帧都在整个画面上识别
+        """
+        if not 1 <= num_players <= MAX_PLAYERS:
+            raise ValueError(f"玩家数必须在 1 到 {MAX_PLAYERS} 之间: {num_players}")
+        self.num_players = num_players
+        if num_players > 1:
+            use_roi = False
+            detect_interval = 1
+        self.width = width
+        self.height = height
+
+        # 识别输入的分辨率与显示分辨率解耦
+        inference_width = min(inference_width, width)
+        self.inference_area = inference_width * round(height * inference_width / width)
+        self.use_roi = use_roi
+        self.hand_bbox = None  # 上一帧手部关键点的包围盒 (x0, y0, x1, y1)，面板像素坐标
+
+        # 识别间隔与帧间光流跟踪
+        self.cadence = DetectionCadence(detect_interval, adaptive_cadence)
+        self.hand_score = 0.0  # 最近一次完整识别的置信度
+        self.tracked_landmarks = None  # 正在跟踪的关键点
+        self.prev_gray = None  # 上一帧的灰度图，用于光流
+
+        # 相机设置
+        self.current_camera_index = None  # 当前实体相机的索引，尚未连接或不是实体相机时为 None
+        self.max_camera_index = 3  # 尝试最多4个相机索引（0-3）
+        self.source = None
+        self.supervisor = None
+        if source is None:
+            # 相机的查找、连接和断线重连都在后台进行，同时加载手部检测器，capture_frame 从不等待设备
+            self.supervisor = CameraSupervisor(self.max_camera_index)
+            self.supervisor.connect(camera_index)
+
+        # 每个相机实例拥有自己的手部检测器，便于在子进程中独立运行
+        self.hands = create_hands(hand_detector, num_players)
+
+        if source is not None:
+            if not isinstance(source, FrameSource):
+                # 合成画面为每名玩家生成一个标记
+                source = open_source(source, width, height, num_markers=num_players)
+            self.source = source
+            if self.source.is_device:
+                # 直接指定的实体相机（例如 --source 0），断开后同样交给后台重新连接
+                self.current_camera_index = self.source.index
+                if not self.source.is_opened():
+                    print(f"无法打开相机 {self.current_camera_index}，正在后台重试")
+                    self.reconnect_device()
+            elif not self.source.is_opened():
+                print(f"无法打开画面来源 {source}")
+
+        # 每名玩家的挥手检测状态
+        self.wave_detectors = [WaveDetector() for _ in range(num_players)]
+
+        # 最近一帧的检测结果
+        self.last_player_landmarks = [None] * num_players  # 每名玩家的Mediapipe关键点，未检测到手时为None
+        self.last_frame_time = 0.0  # 最近一帧的采集时间戳 (time.time())
+        self.frame_timestamp = 0.0  # 最近一帧在画面来源中的时间戳，手势的冷却时间以此计算
+        self.stage_times = {}  # 最近一帧各处理阶段的耗时（秒）
+        self._crop = None  # (画面尺寸, 裁剪切片, 插值方式)，见 fit_frame
+        self._placeholders = {}  # 提示文字 -> 占位画面
+
+    def adopt_ready_source(self):
+        """换用后台已经打开的相机（首次连接、重新连接或切换），没有时什么也不做"""
+        source = self.supervisor.take()
+        if source is None:
+            return
+        if self.source is not None:
+            self.source.release()
+        self.source = source
+        self.current_camera_index = source.index
+        print(f"成功连接到相机 {source.index}: {source.mode}")
+        # 清除历史记录
+        for detector in self.wave_detectors:
+            detector.clear()
+        self.hand_bbox = None
+        self.tracked_landmarks = None
+
+    def reconnect_device(self):
+        """释放不可用的实体相机，交给后台按原索引重新连接"""
+        self.source.release()
+        self.source = None
+        if self.supervisor is None:
+            self.supervisor = CameraSupervisor(self.max_camera_index)  # 直接指定的相机没有创建过后台线程
+        self.supervisor.connect(self.current_camera_index)
+
+    def switch_camera(self):
+        """请求切换到下一个相机，探测在后台进行，新相机打开之前继续使用当前画面"""
+        if self.supervisor is None:
+            self.supervisor = CameraSupervisor(self.max_camera_index)  # 从离线画面切换到实体相机
+        if self.source is None or not self.source.is_opened():
+            # 没有正在使用的画面（相机断开或尚未找到），切换等同于重新连接，保留退避重试
+            self.supervisor.connect(self.current_camera_index)
+        else:
+            self.supervisor.switch(self.current_camera_index)
+
+    def placeholder_frame(self, *lines):
+        """带提示文字的空白画面，按文字缓存，调用方不能修改返回的画面"""
+        frame = self._placeholders.get(lines)
+        if frame is None:
+            frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+            font = cv2.FONT_HERSHEY_SIMPLEX
+            for i, line in enumerate(lines):
+                cv2.putText(frame, line, (50, self.height//2 + i * 40),
+                           font, 1, (255, 255, 255), 2, cv2.LINE_AA)
+            self._placeholders[lines] = frame
+        return frame
+
+    def capture_frame(self):
+        """
+        捕获并处理相机画面
+        返回 (frame, jump_triggered)，frame 为裁剪缩放后的原始BGR画面，识别到的关键点见 last_player_landmarks；
+        jump_triggered 为本帧触发跳跃的玩家位掩码（第 i 位对应第 i 名玩家），单人时为 0 或 1
+        """
+        self.last_player_landmarks = [None] * self.num_players
+        self.last_frame_time = time.time()
+        stage_start = time.perf_counter()
+        stage_times = self.stage_times = {}
+
+        if self.supervisor is not None:
+            self.adopt_ready_source()
+        if self.source is not None and self.source.is_device and not self.source.is_opened():
+            # 实体相机已经关闭，交给后台重新连接
+            print(f"相机 {self.current_camera_index} 已关闭，正在重新连接")
+            self.reconnect_device()
+        if self.source is None or not self.source.is_opened():
+            # 相机仍在后台查找中，显示缓存的占位画面
+            return self.placeholder_frame("Camera not available", "Press G to use keyboard"), 0
+
+        success, frame, timestamp = self.source.read()
+        if not success:
+            if self.source.is_device:
+                # 相机断开（例如被拔出），交给后台重新连接
+                print(f"相机 {self.current_camera_index} 读取失败，正在重新连接")
+                self.reconnect_device()
+            # 如果读取失败，返回空白帧
+            return self.placeholder_frame("Camera feed unavailable"), 0
+        self.frame_timestamp = timestamp
+        now = time.perf_counter()
+        stage_times["read"] = now - stage_start
+        stage_start = now
+
+        # 裁剪缩放到显示区域，并翻转画面(镜像), 使其符合用户直觉
+        frame = self.fit_frame(frame)
+        if self.source.mirror:
+            cv2.flip(frame, 1, dst=frame)
+
+        now = time.perf_counter()
+        stage_times["preprocess"] = now - stage_start
+        stage_start = now
+
+        # 使用Mediapipe检测手部，多人模式下一次识别所有玩家的手
+        hands = self.detect_hand(frame)
+        now = time.perf_counter()
+        stage_times["detect"] = now - stage_start
+        stage_start = now
+
+        jump_triggered = 0
+        player_landmarks = self.assign_hands(hands)
+        for player, (detector, hand_landmarks) in enumerate(zip(self.wave_detectors, player_landmarks)):
+            if hand_landmarks is None:
+                # 如果没有检测到这名玩家的手，清空历史记录
+                detector.clear()
+                continue
+            # 获取手掌中心点(使用食指根部关节作为参考点)
+            index_base = hand_landmarks.landmark[TRACKED_LANDMARK]
+            hand_position = (int(index_base.x * self.width), int(index_base.y * self.height))
+            if detector.update(hand_position, self.frame_timestamp):
+                jump_triggered |= 1 << player
+        if hands:
+            stage_times["gesture"] = time.perf_counter() - stage_start
+        self.last_player_landmarks = player_landmarks
+
+        # 画面本身不做任何修改，骨架和轨迹由游戏根据关键点单独绘制
+        return frame, jump_triggered
+
+    def assign_hands(self, hands):
+        """
+        把本帧检测到的手分配给玩家，返回每名玩家的关键点（没有对应的手时为 None）
+        上一帧有手的玩家优先匹配距离最近的手，其余的手按从左到右的顺序分配给空闲的玩家
+        """
+        positions = [(hand.landmark[TRACKED_LANDMARK].x * self.width,
+                      hand.landmark[TRACKED_LANDMARK].y * self.height) for hand in hands]
+        assigned = [None] * self.num_players
+        free_hands = set(range(len(hands)))
+        pairs = []
+        for player, detector in enumerate(self.wave_detectors):
+            if detector.position is not None:
+                px, py = detector.position
+                for hand, (x, y) in enumerate(positions):
+                    distance = math.hypot(x - px, y - py)
+                    if distance <= TRACK_MAX_DISTANCE:
+                        pairs.append((distance, player, hand))
+        for _, player, hand in sorted(pairs):
+            if assigned[player] is None and hand in free_hands:
+                assigned[player] = hands[hand]
+                free_hands.remove(hand)
+
+        free_players = [player for player in range(self.num_players) if assigned[player] is None]
+        for player, hand in zip(free_players, sorted(free_hands, key=lambda hand: positions[hand][0])):
+            assigned[player] = hands[hand]
+        return assigned
+
+    def fit_frame(self, frame):
+        """
+        把任意尺寸的画面裁剪为显示区域的宽高比并缩放，只做一次缩放。
+        居中裁剪在原图上只是切片（不拷贝），裁剪区域按画面尺寸缓存；尺寸已一致时原样返回。
+        """
+        shape = frame.shape[:2]
+        if shape == (self.height, self.width):
+            return frame
+        if self._crop is None or self._crop[0] != shape:
+            frame_height, frame_width = shape
+            crop_width = min(frame_width, round(frame_height * self.width / self.height))
+            crop_height = min(frame_height, round(crop_width * self.height / self.width))
+            left = (frame_width - crop_width) // 2
+            top = (frame_height - crop_height) // 2
+            # 缩小到一半以下时用区域插值避免混叠，其余情况双线性插值更快
+            interpolation = cv2.INTER_AREA if crop_height >= 2 * self.height else cv2.INTER_LINEAR
+            self._crop = (shape, (slice(top, top + crop_height), slice(left, left + crop_width)), interpolation)
+        _, (rows, cols), interpolation = self._crop
+        return cv2.resize(frame[rows, cols], (self.width, self.height), interpolation=interpolation)
+
+    def inference_region(self):
+        """本帧送入模型的区域 (x0, y0, x1, y1)：跟踪到手时为手部附近，否则为整个画面"""
+        if not self.use_roi or self.hand_bbox is None:
+            return 0, 0, self.width, self.height
+
+        x0, y0, x1, y1 = self.hand_bbox
+        size = max(x1 - x0, y1 - y0) * ROI_SCALE
+        size = min(max(size, ROI_MIN_SIZE), self.width, self.height)
+        center_x = (x0 + x1) / 2
+        center_y = (y0 + y1) / 2
+        # 保证裁剪区域不超出画面
+        left = int(min(max(center_x - size / 2, 0), self.width - size))
+        top = int(min(max(center_y - size / 2, 0), self.height - size))
+        return left, top, left + int(size), top + int(size)
+
+    def run_hands(self, frame, region):
+        """
+        在画面的指定区域上运行Mediapipe，区域面积超过识别分辨率时先缩小
+        返回映射回整个画面归一化坐标的关键点列表，没有检测到手时为空列表
+        """
+        x0, y0, x1, y1 = region
+        roi = frame[y0:y1, x0:x1]
+        roi_width = x1 - x0
+        roi_height = y1 - y0
+
+        # 先缩小再转换颜色，转换的像素更少
+        scale = math.sqrt(self.inference_area / (roi_width * roi_height))
+        if scale < 1:
+            roi = cv2.resize(roi, (max(1, round(roi_width * scale)), max(1, round(roi_height * scale))),
+                             interpolation=cv2.INTER_AREA)
+        inference_start = time.perf_counter()
+        results = self.hands.process(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
+        # ROI 中没有找到手时同一帧会推理两次，耗时累加
+        self.stage_times["inference"] = self.stage_times.get("inference", 0.0) + time.perf_counter() - inference_start
+        if not results.multi_hand_landmarks:
+            return []
+
+        if results.multi_handedness:
+            self.hand_score = results.multi_handedness[0].classification[0].score
+        # 关键点坐标相对于识别区域归一化，映射回整个画面
+        hands = list(results.multi_hand_landmarks)
+        for hand_landmarks in hands:
+            for landmark in hand_landmarks.landmark:
+                landmark.x = (x0 + landmark.x * roi_width) / self.width
+                landmark.y = (y0 + landmark.y * roi_height) / self.height
+        return hands
+
+    def track_hand(self, gray):
+        """
+        用金字塔LK光流跟踪5号关键点，其余关键点随之平移
+        正反向误差过大或跟踪失败时返回 None
+        """
+        landmark = self.tracked_landmarks.landmark[TRACKED_LANDMARK]
+        prev_point = np.array([[[landmark.x * self.width, landmark.y * self.height]]], dtype=np.float32)
+        next_point, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, prev_point, None, **LK_PARAMS)
+        if not status[0][0]:
+            return None
+        # 反向跟踪回上一帧，检查是否回到原来的位置
+        back_point, status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, next_point, None, **LK_PARAMS)
+        if not status[0][0] or np.abs(back_point - prev_point).max() > MAX_TRACKING_ERROR:
+            return None
+
+        x, y = next_point[0][0]
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        dx = (x - prev_point[0][0][0]) / self.width
+        dy = (y - prev_point[0][0][1]) / self.height
+        for landmark in self.tracked_landmarks.landmark:
+            landmark.x += dx
+            landmark.y += dy
+        return self.tracked_landmarks
+
+    def detect_hand(self, frame):
+        """
+        检测手部关键点（坐标相对于整个画面归一化），返回检测到的手的列表
+        开启识别间隔时（只用于单只手），两次完整识别之间用光流跟踪代替
+        """
+        if not self.cadence.enabled:
+            return self.run_detection(frame)
+
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        hands = []
+        if self.tracked_landmarks is not None and not self.cadence.should_detect():
+            hand_landmarks = self.track_hand(gray)
+            if hand_landmarks is not None:
+                hands = [hand_landmarks]
+                self.update_hand_bbox(hand_landmarks)
+                self.cadence.record(False, time.perf_counter() - start)
+        if not hands:
+            hands = self.run_detection(frame)
+            self.cadence.record(True, time.perf_counter() - start)
+            if hands and self.hand_score < MIN_HAND_SCORE:
+                # 置信度偏低，下一帧继续完整识别
+                self.cadence.reset()
+
+        self.prev_gray = gray
+        self.tracked_landmarks = hands[0] if hands else None
+        return hands
+
+    def run_detection(self, frame):
+        """运行完整的Mediapipe识别"""
+        region = self.inference_region()
+        hands = self.run_hands(frame, region)
+        if not hands and region != (0, 0, self.width, self.height):
+            # 手移出了裁剪区域，立即在整个画面上重新检测，避免丢失挥手动作
+            hands = self.run_hands(frame, (0, 0, self.width, self.height))
+
+        if not hands:
+            self.hand_bbox = None
+            return []
+
+        self.update_hand_bbox(hands[0])
+        return hands
+
+    def update_hand_bbox(self, hand_landmarks):
+        xs = [landmark.x * self.width for landmark in hand_landmarks.landmark]
+        ys = [landmark.y * self.height for landmark in hand_landmarks.landmark]
+        self.hand_bbox = (min(xs), min(ys), max(xs), max(ys))
+
+    def release(self):
+        """释放相机资源"""
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        try:
+            if self.source is not None and self.source.is_opened():
+                self.source.release()
+        except Exception as e:
+            print(f"Error releasing camera: {e}")
@@ -0,0 +1,287 @@
+"""
+多进程手势检测模式
+
+检测子进程独占 cv2.VideoCapture 与 Mediapipe 手部检测器，
+把每一帧画面与识别结果写入 multiprocessing.shared_memory 环形缓冲区。
+游戏进程直接映射这块内存读取画面，整个过程不需要 pickle，也没有逐帧拷贝。
+
+共享内存布局:
+    [头部 HEADER_DTYPE] [记录 RECORD_DTYPE x N] [画面 RGB uint8 (H, W, 3) x N]
+每个画面槽位旁边都有一条固定格式的记录，保存帧序号、时间戳、手势标记和每名玩家的关键点。
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from camera import CAMERA_STAGES, MAX_PLAYERS, Camera, FRAME_HEIGHT, FRAME_WIDTH, NUM_LANDMARKS, landmark_array
+
+# 环形缓冲区槽位数，读取方只使用最新槽位，写入方需要绕一圈才会覆盖它
+NUM_SLOTS = 4
+
+# 跳跃事件环形缓冲区的容量，读取方每帧都会读取，跳跃之间还有冷却时间，未读取的事件远少于这个数
+JUMP_EVENT_SLOTS = 16
+
+# 头部：单写者字段，检测进程写 latest_seq、jump_events、jump_masks、jump_timestamps、camera_index 和 failed，
+# 游戏进程写控制字段 switch_count、active 和 stop
+HEADER_DTYPE = np.dtype([
+    ("latest_seq", "<i8"),    # 最新写入完成的帧序号，-1 表示还没有数据
+    ("jump_events", "<i8"),   # 累计的跳跃事件数（每个触发跳跃的画面一个），读取方比较差值，不会丢失跳跃
+    ("jump_masks", "u1", (JUMP_EVENT_SLOTS,)),  # 第 n 个跳跃事件触发跳跃的玩家位掩码，位于 n % JUMP_EVENT_SLOTS
+    ("jump_timestamps", "<f8", (JUMP_EVENT_SLOTS,)),  # 第 n 个跳跃事件的画面采集时间 (time.time())
+    ("camera_index", "<i4"),  # 当前使用的相机索引
+    ("failed", "u1"),         # 检测进程因异常退出
+    ("switch_count", "<u4"),  # 游戏进程请求切换相机的次数
+    ("active", "u1"),         # 为0时检测进程暂停采集
+    ("stop", "u1"),           # 为1时检测进程退出
+])
+
+# 每个槽位的记录
+RECORD_DTYPE = np.dtype([
+    ("seq", "<i8"),                                # 本槽位当前画面的帧序号
+    ("timestamp", "<f8"),                          # 采集时间 (time.time())
+    ("jump", "u1"),                                # 本帧触发跳跃的玩家位掩码
+    ("has_hand", "u1", (MAX_PLAYERS,)),            # 本帧是否检测到每名玩家的手
+    ("landmarks", "<f4", (MAX_PLAYERS, NUM_LANDMARKS, 3)),  # 每名玩家的归一化关键点坐标 (x, y, z)
+    ("stage_times", "<f4", (len(CAMERA_STAGES),)),  # 各处理阶段耗时（秒），本帧没有该阶段时为 NaN
+])
+
+_ALIGN = 64
+
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameRing:
+    """共享内存中的画面环形缓冲区"""
+
+    def __init__(self, shm, num_slots, width, height):
+        self.shm = shm
+        self.num_slots = num_slots
+        self.width = width
+        self.height = height
+
+        records_offset = _align(HEADER_DTYPE.itemsize)
+        frames_offset = _align(records_offset + RECORD_DTYPE.itemsize * num_slots)
+        frame_size = width * height * 3
+
+        # 以下都是共享内存上的视图，读写不产生拷贝
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf, offset=0)
+        self.records = np.ndarray((num_slots,), dtype=RECORD_DTYPE, buffer=shm.buf, offset=records_offset)
+        self.frames = [
+            np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf,
+                       offset=frames_offset + i * frame_size)
+            for i in range(num_slots)
+        ]
+
+    @staticmethod
+    def required_size(num_slots, width, height):
+        """计算缓冲区所需字节数"""
+        records_offset = _align(HEADER_DTYPE.itemsize)
+        frames_offset = _align(records_offset + RECORD_DTYPE.itemsize * num_slots)
+        return frames_offset + num_slots * width * height * 3
+
+    @classmethod
+    def create(cls, num_slots=NUM_SLOTS, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        """创建新的共享内存缓冲区（游戏进程调用）"""
+        shm = shared_memory.SharedMemory(create=True, size=cls.required_size(num_slots, width, height))
+        ring = cls(shm, num_slots, width, height)
+        for field in HEADER_DTYPE.names:
+            ring.header[field] = 0
+        ring.header["latest_seq"] = -1
+        ring.header["camera_index"] = -1
+        ring.header["active"] = 1
+        ring.records["seq"] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name, num_slots=NUM_SLOTS, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        """连接到已存在的共享内存缓冲区（检测进程调用）"""
+        return cls(shared_memory.SharedMemory(name=name), num_slots, width, height)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, seq, frame_bgr, timestamp, jump, player_landmarks, stage_times=None):
+        """
+        把一帧写入 seq 对应的槽位，写完后再发布序号
+        jump 为触发跳跃的玩家位掩码，player_landmarks 为每名玩家的关键点（没有检测到手时为 None）
+        """
+        slot = seq % self.num_slots
+        record = self.records[slot]
+        record["seq"] = -1  # 写入期间标记为无效
+
+        # 颜色转换直接写入共享内存，不产生中间数组
+        cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=self.frames[slot])
+
+        record["timestamp"] = timestamp
+        record["jump"] = jump
+        for player in range(MAX_PLAYERS):
+            hand_landmarks = player_landmarks[player] if player < len(player_landmarks) else None
+            record["has_hand"][player] = hand_landmarks is not None
+            if hand_landmarks is not None:
+                record["landmarks"][player] = landmark_array(hand_landmarks)
+        stage_times = stage_times or {}
+        record["stage_times"] = [stage_times.get(stage, np.nan) for stage in CAMERA_STAGES]
+
+        if jump:
+            # 先写事件内容再增加事件数，读取方看到新的事件数时内容已经就绪
+            events = int(self.header["jump_events"])
+            self.header["jump_masks"][events % JUMP_EVENT_SLOTS] = jump
+            self.header["jump_timestamps"][events % JUMP_EVENT_SLOTS] = timestamp
+            self.header["jump_events"] = events + 1
+        record["seq"] = seq
+        self.header["latest_seq"] = seq
+
+    def latest(self):
+        """返回 (槽位, 记录) ，还没有数据时返回 (None, None)"""
+        seq = int(self.header["latest_seq"])
+        if seq < 0:
+            return None, None
+        slot = seq % self.num_slots
+        record = self.records[slot]
+        if int(record["seq"]) != seq:
+            # 槽位正在被改写（读取方落后了一整圈），本次跳过
+            return None, None
+        return slot, record
+
+    def close(self, unlink=False):
+        """断开与共享内存的连接，仍有画面引用时只能等待其释放"""
+        self.header = None
+        self.records = None
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # 还有 Surface 引用着缓冲区，交给垃圾回收
+            pass
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _camera_index_field(camera):
+    """头部中的相机索引，不是实体相机时为 -1"""
+    return -1 if camera.current_camera_index is None else camera.current_camera_index
+
+
+def run_detector(shm_name, num_slots, width, height, camera_index, camera_options):
+    """检测子进程入口：采集、识别并写入共享内存，camera_options 为传给 Camera 的额外参数"""
+    ring = FrameRing.attach(shm_name, num_slots, width, height)
+    header = ring.header
+    camera = None
+    try:
+        camera = Camera(width, height, camera_index=camera_index, **camera_options)
+        header["camera_index"] = _camera_index_field(camera)
+
+        switch_count = int(header["switch_count"])
+        seq = 0
+        frame_interval = 1.0 / 60
+        while not header["stop"]:
+            if not header["active"]:
+                time.sleep(0.05)
+                continue
+            start = time.perf_counter()
+
+            if int(header["switch_count"]) != switch_count:
+                switch_count = int(header["switch_count"])
+                camera.switch_camera()
+
+            frame, jump_triggered = camera.capture_frame()
+            # 相机在后台连接或切换，每帧同步当前索引
+            header["camera_index"] = _camera_index_field(camera)
+            ring.write(seq, frame, camera.last_frame_time, jump_triggered, camera.last_player_landmarks,
+                       camera.stage_times)
+            seq += 1
+
+            # 相机不可用时 capture_frame 会立即返回，限制循环频率防止空转
+            elapsed = time.perf_counter() - start
+            if elapsed < frame_interval:
+                time.sleep(frame_interval - elapsed)
+    except Exception as e:
+        print(f"检测进程出错: {e}")
+        header["failed"] = 1
+    finally:
+        if camera is not None:
+            camera.release()
+        header = None
+        ring.close()
+
+
+class DetectorProcess:
+    """游戏进程一侧的检测子进程句柄"""
+
+    def __init__(self, camera_index=None, num_slots=NUM_SLOTS, width=FRAME_WIDTH, height=FRAME_HEIGHT,
+                 camera_options=None):
+        self.ring = FrameRing.create(num_slots, width, height)
+        # 使用 spawn 启动，避免在已有线程的进程中 fork 导致 Mediapipe 死锁
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=run_detector,
+            args=(self.ring.name, num_slots, width, height, camera_index, camera_options or {}),
+            name="hand-detector",
+            daemon=True,
+        )
+        self._jump_events = 0  # 已经读取的跳跃事件数
+        self._switch_count = 0
+        self.jump_timestamp = None
+
+    def start(self):
+        self.process.start()
+
+    @property
+    def camera_index(self):
+        """当前相机索引，检测进程尚未就绪或使用离线画面时为 None"""
+        index = int(self.ring.header["camera_index"])
+        return index if index >= 0 else None
+
+    @property
+    def failed(self):
+        """检测进程是否异常退出"""
+        if self.ring.header["failed"]:
+            return True
+        return self.process.exitcode is not None and not self.ring.header["stop"]
+
+    def set_active(self, active):
+        self.ring.header["active"] = 1 if active else 0
+
+    def request_switch(self):
+        self._switch_count += 1
+        self.ring.header["switch_count"] = self._switch_count
+
+    def poll(self):
+        """
+        非阻塞读取最新一帧
+        返回 (槽位, 记录, 有新增跳跃的玩家位掩码)，没有新画面时槽位为 None
+        有新增跳跃时，jump_timestamp 为其中最早一次跳跃的画面采集时间（与线程模式的 CameraWorker 相同）
+        """
+        header = self.ring.header
+        events = int(header["jump_events"])
+        # 落后超过一圈时较早的事件已被覆盖，只能从仍在缓冲区中的事件开始
+        first = max(self._jump_events, events - JUMP_EVENT_SLOTS)
+        new_jumps = 0
+        for event in range(first, events):
+            new_jumps |= int(header["jump_masks"][event % JUMP_EVENT_SLOTS])
+        if events != first:
+            self.jump_timestamp = float(header["jump_timestamps"][first % JUMP_EVENT_SLOTS])
+        self._jump_events = events
+        slot, record = self.ring.latest()
+        return slot, record, new_jumps
+
+    def stop(self, timeout=2.0):
+        """通知子进程退出并回收共享内存，重复调用时不做任何事"""
+        if self.ring.header is None:
+            return
+        self.ring.header["stop"] = 1
+        if self.process.is_alive():
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.ring.close(unlink=True)
@@ -0,0 +1,255 @@
+"""
+相机画面来源
+
+Camera 通过统一的接口读取画面，不关心画面来自哪里:
+    DeviceSource         - 实体相机（cv2.VideoCapture(索引)），打开时协商采集模式
+    VideoFileSource      - 本地视频文件
+    ImageDirectorySource - 按文件名排序的图片序列目录
+    SyntheticSource      - 合成画面：一个按固定节奏左右挥动的标记，配合 marker 检测器使用
+后三种来源可以在没有摄像头的机器上复现手势识别的性能测试。
+
+每个来源提供 is_opened() / read() / release()，read() 返回 (是否成功, BGR画面, 时间戳)。
+实体相机的时间戳为采集时刻的 time.time()；离线来源的时间戳为媒体时间（帧序号 / 帧率），
+不受处理速度影响，以最快速度回放时手势冷却时间等逻辑仍然与实时播放一致。
+"""
+import os
+import time
+
+import cv2
+import numpy as np
+
+# 图片序列目录中识别的文件扩展名
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# 合成画面中标记的颜色 (BGR)，marker 检测器按该颜色分割
+MARKER_COLOR = (255, 0, 255)
+MARKER_RADIUS = 30
+
+# 实体相机的候选采集模式 (宽, 高, 帧率)，按优先级排列。
+# 手部识别只需要约 200 像素宽的输入，低分辨率、高帧率的模式延迟最低
+CAPTURE_MODES = (
+    (640, 480, 60),
+    (640, 480, 30),
+    (1280, 720, 30),
+    (960, 540, 30),
+    (800, 600, 30),
+)
+CAPTURE_FOURCC = "MJPG"
+CAPTURE_BUFFER_SIZE = 1
+
+
+class FrameSource:
+    """画面来源的基类"""
+    mirror = False  # 画面是否需要水平翻转（实体相机翻转后更符合直觉）
+    is_device = False
+
+    def is_opened(self):
+        raise NotImplementedError
+
+    def read(self):
+        """读取下一帧，返回 (是否成功, BGR画面, 时间戳)"""
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class CaptureMode:
+    """与相机协商后实际生效的采集模式"""
+
+    def __init__(self, width, height, fps, fourcc, buffer_size):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc  # 像素格式，例如 MJPG、YUYV，驱动不报告时为空字符串
+        self.buffer_size = buffer_size  # 驱动缓存的帧数，0 表示驱动不支持查询
+
+    def __str__(self):
+        buffer = f", 缓冲 {self.buffer_size} 帧" if self.buffer_size else ""
+        return f"{self.width}x{self.height} @ {self.fps:g}fps {self.fourcc or '?'}{buffer}"
+
+
+def decode_fourcc(value):
+    """把 CAP_PROP_FOURCC 返回的数值还原为四个字符"""
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ")
+
+
+class DeviceSource(FrameSource):
+    """
+    实体相机，打开时按 modes 的顺序协商采集模式，使用第一个驱动真正接受的分辨率:
+    只请求相机原生支持的横向分辨率，避免驱动回退到其他分辨率后每帧再额外缩放；
+    优先使用 MJPG 压缩格式，USB 带宽相同时可以达到更高的帧率；
+    驱动缓冲区设为 1 帧，读到的总是最新画面，不会积压几帧的延迟。
+    画面的裁剪和缩放由 Camera 一步完成。
+    """
+    mirror = True
+    is_device = True
+
+    def __init__(self, index, modes=CAPTURE_MODES, fourcc=CAPTURE_FOURCC, buffer_size=CAPTURE_BUFFER_SIZE):
+        self.index = index
+        self.mode = None
+        self.cap = cv2.VideoCapture(index)
+        if self.cap.isOpened():
+            self.mode = self.negotiate(modes, fourcc, buffer_size)
+
+    def negotiate(self, modes, fourcc, buffer_size):
+        """依次请求候选模式，返回实际生效的 CaptureMode"""
+        cap = self.cap
+        # 部分驱动只有在设置分辨率之前设置像素格式才会生效
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        for width, height, fps in modes:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            cap.set(cv2.CAP_PROP_FPS, fps)
+            if (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) == (width, height):
+                break
+        # 没有候选模式被接受时保留驱动选择的模式，同样如实报告
+        return CaptureMode(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                           cap.get(cv2.CAP_PROP_FPS), decode_fourcc(cap.get(cv2.CAP_PROP_FOURCC)),
+                           int(cap.get(cv2.CAP_PROP_BUFFERSIZE)))
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        success, frame = self.cap.read()
+        return success, frame, time.time()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """本地视频文件，loop 为 True 时播放到结尾后从头开始"""
+
+    def __init__(self, path, loop=True, mirror=False):
+        self.path = path
+        self.loop = loop
+        self.mirror = mirror
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_index = 0  # 累计读取的帧数，循环播放时继续增加，保证时间戳单调递增
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        success, frame = self.cap.read()
+        if not success and self.loop and self.frame_index > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        if not success:
+            return False, None, None
+        timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+        return True, frame, timestamp
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """图片序列目录，按文件名顺序逐张读取"""
+
+    def __init__(self, path, fps=30.0, loop=True, mirror=False):
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.mirror = mirror
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.frame_index = 0
+
+    def is_opened(self):
+        return len(self.files) > 0
+
+    def read(self):
+        if self.frame_index >= len(self.files) and not self.loop:
+            return False, None, None
+        frame = cv2.imread(self.files[self.frame_index % len(self.files)])
+        if frame is None:
+            return False, None, None
+        timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+        return True, frame, timestamp
+
+
+class SyntheticSource(FrameSource):
+    """
+    合成画面：标记每隔 wave_interval 秒在 wave_duration 秒内从画面一侧快速移动到另一侧，
+    其余时间保持静止，每次移动相当于一次挥手。
+    num_markers 大于1时画面中有多个标记（模拟多名玩家），各占一行，挥手时刻依次错开。
+    num_frames 为 None 时无限生成。
+    """
+
+    def __init__(self, width, height, fps=60.0, wave_interval=1.0, wave_duration=0.1, amplitude=0.3,
+                 num_frames=None, num_markers=1):
+        self.num_markers = num_markers
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.wave_interval = wave_interval
+        self.wave_duration = wave_duration
+        self.amplitude = amplitude
+        self.num_frames = num_frames
+        self.frame_index = 0
+
+        # 带纹理的静态背景，光流跟踪需要一些细节
+        rng = np.random.default_rng(0)
+        noise = rng.integers(0, 40, (height, width, 1), dtype=np.uint8)
+        gradient = np.linspace(60, 140, width, dtype=np.uint8)[None, :, None]
+        self.background = np.ascontiguousarray(np.broadcast_to(noise + gradient, (height, width, 3)))
+
+    def is_opened(self):
+        return True
+
+    def marker_position(self, timestamp, marker=0):
+        """给定时刻第 marker 个标记中心的像素坐标"""
+        timestamp -= marker * self.wave_interval / self.num_markers
+        wave, phase = divmod(timestamp, self.wave_interval)
+        progress = min(phase / self.wave_duration, 1.0)
+        # 偶数次挥手从左到右，奇数次从右到左
+        start = -1 if int(wave) % 2 == 0 else 1
+        offset = start - 2 * start * progress
+        x = self.width / 2 + offset * self.amplitude * self.width
+        return int(round(x)), self.height * (marker + 1) // (self.num_markers + 1)
+
+    def wave_start(self, timestamp):
+        """给定时刻之前（含）第一个标记最近一次挥手开始的时刻"""
+        return timestamp // self.wave_interval * self.wave_interval
+
+    def waves_until(self, timestamp):
+        """到给定时刻为止第一个标记已经完成的挥手次数"""
+        wave, phase = divmod(timestamp, self.wave_interval)
+        return int(wave) + (1 if phase >= self.wave_duration else 0)
+
+    def read(self):
+        if self.num_frames is not None and self.frame_index >= self.num_frames:
+            return False, None, None
+        timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+        frame = self.background.copy()
+        for marker in range(self.num_markers):
+            cv2.circle(frame, self.marker_position(timestamp, marker), MARKER_RADIUS, MARKER_COLOR, -1)
+        return True, frame, timestamp
+
+
+def open_source(spec, width, height, loop=True, num_markers=1):
+    """
+    根据描述创建画面来源:
+        整数        - 实体相机索引（width、height 只用于合成画面，实体相机使用协商得到的原生分辨率）
+        "synthetic" - 合成画面，包含 num_markers 个标记
+        目录路径    - 图片序列
+        其他        - 视频文件路径
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        return DeviceSource(int(spec))
+    if spec == "synthetic":
+        return SyntheticSource(width, height, num_markers=num_markers)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, loop=loop)
+    return VideoFileSource(spec, loop=loop)
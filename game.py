@@ -1,34 +1,41 @@
 import pygame
 import sys
+import os
+import argparse
+import functools
 import random
-import cv2
-import mediapipe as mp
 import numpy as np
-from collections import deque
+import threading
 import time
+from collections import deque
 
-# 初始化pygame和混音器
-pygame.init()
-pygame.mixer.init()
-
-# 初始化Mediapipe手部检测
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+# 手势识别相关的模块（OpenCV、Mediapipe）导入需要一秒以上，只在开启手势控制时才导入，
+# 只用键盘游戏时窗口可以立即显示
+from profiler import LatencyHistogram, StageProfiler
+from replay import ReplayRecorder
+from sim import TICKS_PER_SECOND, SimConfig, Simulation
 
 # 屏幕设置
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 600
 GAME_WIDTH = 800  # 游戏区域宽度
 CAMERA_WIDTH = SCREEN_WIDTH - GAME_WIDTH  # 相机区域宽度
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Flappy Bird - 手势控制版")
+screen = None  # 游戏窗口，由 init_display() 创建
+
+def init_display():
+    """
+    初始化pygame和混音器并创建游戏窗口
+    放在函数中而不是模块顶层，这样检测子进程以 spawn 方式导入本模块时不会初始化pygame或弹出窗口
+    """
+    global screen
+    pygame.init()
+    pygame.mixer.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Flappy Bird - 手势控制版")
+    return screen
+
+# 模拟参数的默认值，小鸟和水管的绘制尺寸、角度范围都以此为准
+DEFAULT_SIM_CONFIG = SimConfig()
 
 # 颜色定义
 WHITE = (255, 255, 255)
@@ -38,28 +45,40 @@ GREEN = (0, 128, 0)
 GROUND_COLOR = (222, 184, 135)
 
 # 字体设置
+# 尝试使用系统中常见的中文字体
+CHINESE_FONTS = [
+    'Arial Unicode MS', 
+    'Microsoft YaHei', 
+    'SimHei', 
+    'SimSun', 
+    'NSimSun',
+    'FangSong',
+    'STHeiti',
+    'STSong',
+    'PingFang SC',
+    'Hiragino Sans GB'
+]
+
+# 渲染文字缓存的容量，超出后淘汰最久未使用的文字
+TEXT_CACHE_SIZE = 64
+
+@functools.lru_cache(maxsize=None)
+def find_chinese_font():
+    """查找系统中支持中文的字体，只扫描一次系统字体列表，找不到时返回 None"""
+    available_fonts = {f.lower() for f in pygame.font.get_fonts()}
+    for font_name in CHINESE_FONTS:
+        if font_name.lower() in available_fonts:
+            return font_name
+    return None
+
+@functools.lru_cache(maxsize=None)
 def get_font(size):
     """
-    获取支持中文的字体
+    获取支持中文的字体，每种字号只创建一次
     """
-    # 尝试使用系统中常见的中文字体
-    chinese_fonts = [
-        'Arial Unicode MS', 
-        'Microsoft YaHei', 
-        'SimHei', 
-        'SimSun', 
-        'NSimSun',
-        'FangSong',
-        'STHeiti',
-        'STSong',
-        'PingFang SC',
-        'Hiragino Sans GB'
-    ]
-    
-    # 尝试使用系统中支持中文的字体
-    for font_name in chinese_fonts:
-        if font_name.lower() in [f.lower() for f in pygame.font.get_fonts()]:
-            return pygame.font.SysFont(font_name, size)
+    font_name = find_chinese_font()
+    if font_name is not None:
+        return pygame.font.SysFont(font_name, size)
     
     # 如果没有找到合适的字体，尝试使用默认字体
     try:
@@ -67,20 +86,110 @@ def get_font(size):
     except:
         return pygame.font.SysFont(None, size)  # 最终回退选项
 
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, size, color):
+    """
+    渲染文字并缓存结果，只有内容变化的文字（例如分数）才会重新光栅化
+    color 需要是元组以便作为缓存键
+    """
+    return get_font(size).render(text, True, color)
+
 # 游戏时钟
 clock = pygame.time.Clock()
-FPS = 60
-
-# 音效
-try:
-    jump_sound = pygame.mixer.Sound("jump.wav")
-    score_sound = pygame.mixer.Sound("score.wav")
-    hit_sound = pygame.mixer.Sound("hit.wav")
-except:
-    # 如果音效文件不存在，创建空音效
-    jump_sound = pygame.mixer.Sound(buffer=bytearray(100))
-    score_sound = pygame.mixer.Sound(buffer=bytearray(100))
-    hit_sound = pygame.mixer.Sound(buffer=bytearray(100))
+FPS = 60  # 默认的渲染帧率上限
+
+# 固定时间步长：物理每个逻辑帧推进 1/TICKS_PER_SECOND 秒，与实际渲染帧率无关
+TICK_INTERVAL = 1.0 / TICKS_PER_SECOND
+# 单帧最多补算的时间，防止长时间卡顿后一次补算过多逻辑帧
+MAX_FRAME_TIME = 0.25
+
+# 分阶段耗时统计，按P键在屏幕上显示
+profiler = StageProfiler()
+# 从挥手画面被采集到小鸟跳跃的延迟分布，退出时打印
+jump_latency = LatencyHistogram()
+
+# 资源路径，小鸟图像中的 {color} 为小鸟颜色
+BIRD_IMAGE = "assets/sprites/{color}bird-midflap.png"
+# 扇翅动画帧：上扬、平展、下压、平展
+BIRD_FLAP_IMAGES = (
+    "assets/sprites/{color}bird-upflap.png",
+    "assets/sprites/{color}bird-midflap.png",
+    "assets/sprites/{color}bird-downflap.png",
+    "assets/sprites/{color}bird-midflap.png",
+)
+# 多人模式下每名玩家的小鸟颜色，单人时使用第一种
+BIRD_COLORS = ("red", "blue", "yellow")
+PIPE_IMAGE = "assets/sprites/pipe-green.png"
+BACKGROUND_IMAGE = "assets/sprites/background-day.png"
+GROUND_IMAGE = "assets/sprites/base.png"
+
+class Assets:
+    """
+    全局资源缓存
+    图像按 (路径, 目标尺寸, 是否透明, 是否上下翻转) 缓存，音效按路径缓存。
+    所有实体共享同一份 Surface，生成水管或重新开始游戏时不再读盘和解码。
+    """
+    def __init__(self):
+        self._images = {}
+        self._sounds = {}
+
+    def image(self, path, size=None, alpha=True, flip=False):
+        """获取图像，加载失败时返回 None（失败结果同样会被缓存）"""
+        key = (path, size, alpha, flip)
+        if key in self._images:
+            return self._images[key]
+
+        image = None
+        try:
+            if size is None and not flip:
+                image = pygame.image.load(path)
+                image = image.convert_alpha() if alpha else image.convert()
+            else:
+                # 缩放和翻转都基于缓存的原图
+                image = self.image(path, alpha=alpha)
+                if image is not None:
+                    if size is not None:
+                        image = pygame.transform.scale(image, size)
+                    if flip:
+                        image = pygame.transform.flip(image, False, True)
+        except Exception as e:
+            print(f"无法加载图像 {path}: {e}")
+        self._images[key] = image
+        return image
+
+    def sound(self, path):
+        """获取音效，文件不存在时返回空音效"""
+        if path not in self._sounds:
+            try:
+                self._sounds[path] = pygame.mixer.Sound(path)
+            except Exception:
+                # 如果音效文件不存在，创建空音效
+                self._sounds[path] = pygame.mixer.Sound(buffer=bytearray(100))
+        return self._sounds[path]
+
+    def preload(self):
+        """启动时预加载所有精灵与字体（需要在创建窗口之后调用）"""
+        for size in (18, 24, 36, 64, 72):
+            get_font(size)
+        for color in BIRD_COLORS:
+            for path in set(BIRD_FLAP_IMAGES) | {BIRD_IMAGE}:
+                bird_rotation_table(path.format(color=color))
+        bird_rotation_table(None)
+        self.image(PIPE_IMAGE, (DEFAULT_SIM_CONFIG.pipe_width, SCREEN_HEIGHT))
+        self.image(PIPE_IMAGE, (DEFAULT_SIM_CONFIG.pipe_width, SCREEN_HEIGHT), flip=True)
+        self.image(BACKGROUND_IMAGE, (GAME_WIDTH, SCREEN_HEIGHT), alpha=False)
+        ground = self.image(GROUND_IMAGE, alpha=False)
+        if ground is not None:
+            self.image(GROUND_IMAGE, (GAME_WIDTH, ground.get_height()), alpha=False)
+        for path in (JUMP_SOUND, SCORE_SOUND, HIT_SOUND):
+            self.sound(path)
+
+assets = Assets()
+
+# 音效，需要在混音器初始化之后通过 assets.sound() 获取
+JUMP_SOUND = "jump.wav"
+SCORE_SOUND = "score.wav"
+HIT_SOUND = "hit.wav"
 
 # 背景和地面设置
 class Background:
@@ -91,21 +200,23 @@ class Background:
         self.ground_speed = 3
         self.ground_height = 100  # 根据地面图像调整高度
         
-        # 加载背景和地面图像
-        try:
-            self.bg_img = pygame.image.load("assets/sprites/background-day.png").convert()
-            self.bg_img = pygame.transform.scale(self.bg_img, (GAME_WIDTH, SCREEN_HEIGHT))
-            
-            self.ground_img = pygame.image.load("assets/sprites/base.png").convert()
+        # 从资源缓存获取背景和地面图像
+        self.bg_img = assets.image(BACKGROUND_IMAGE, (GAME_WIDTH, SCREEN_HEIGHT), alpha=False)
+        ground_img = assets.image(GROUND_IMAGE, alpha=False)
+        if self.bg_img is not None and ground_img is not None:
             # 获取地面图像的实际高度
-            self.ground_height = self.ground_img.get_height()
+            self.ground_height = ground_img.get_height()
             # 缩放地面图像宽度与游戏区域匹配
-            self.ground_img = pygame.transform.scale(self.ground_img, (GAME_WIDTH, self.ground_height))
-        except Exception as e:
-            print(f"无法加载背景图像: {e}")
+            self.ground_img = assets.image(GROUND_IMAGE, (GAME_WIDTH, self.ground_height), alpha=False)
+        else:
             self.bg_img = None
             self.ground_img = None
             self.ground_height = 50  # 回退到默认高度
+
+    def reset(self):
+        """新的一局从初始位置开始滚动"""
+        self.bg_x = 0
+        self.ground_x = 0
         
     def update(self):
         # 背景滚动 - 确保只在游戏区域内循环，防止出现黑边
@@ -114,16 +225,19 @@ class Background:
         # 地面滚动
         self.ground_x = (self.ground_x - self.ground_speed) % GAME_WIDTH
         
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
+        # alpha 为两个逻辑帧之间的插值系数，1 表示最新位置
+        bg_x = (self.bg_x + self.bg_speed * (1 - alpha)) % GAME_WIDTH
+        ground_x = (self.ground_x + self.ground_speed * (1 - alpha)) % GAME_WIDTH
         if self.bg_img is not None:
             # 修复绘制背景图像的方法，确保覆盖整个游戏区域
             # 先绘制第一张背景图
-            screen.blit(self.bg_img, (self.bg_x, 0))
+            screen.blit(self.bg_img, (bg_x, 0))
             # 填充可能出现的空隙，确保无缝滚动
-            if self.bg_x > 0:
-                screen.blit(self.bg_img, (self.bg_x - GAME_WIDTH, 0))
+            if bg_x > 0:
+                screen.blit(self.bg_img, (bg_x - GAME_WIDTH, 0))
             # 绘制第二张背景图
-            screen.blit(self.bg_img, (self.bg_x + GAME_WIDTH, 0))
+            screen.blit(self.bg_img, (bg_x + GAME_WIDTH, 0))
         else:
             # 回退到纯色背景
             screen.fill(SKY_BLUE, rect=(0, 0, GAME_WIDTH, SCREEN_HEIGHT))
@@ -131,604 +245,963 @@ class Background:
         if self.ground_img is not None:
             # 修复绘制地面图像的方法，确保覆盖整个游戏区域底部
             # 先绘制第一张地面图
-            screen.blit(self.ground_img, (self.ground_x, SCREEN_HEIGHT - self.ground_height))
+            screen.blit(self.ground_img, (ground_x, SCREEN_HEIGHT - self.ground_height))
             # 填充可能出现的空隙，确保无缝滚动
-            if self.ground_x > 0:
-                screen.blit(self.ground_img, (self.ground_x - GAME_WIDTH, SCREEN_HEIGHT - self.ground_height))
+            if ground_x > 0:
+                screen.blit(self.ground_img, (ground_x - GAME_WIDTH, SCREEN_HEIGHT - self.ground_height))
             # 绘制第二张地面图
-            screen.blit(self.ground_img, (self.ground_x + GAME_WIDTH, SCREEN_HEIGHT - self.ground_height))
+            screen.blit(self.ground_img, (ground_x + GAME_WIDTH, SCREEN_HEIGHT - self.ground_height))
         else:
             # 回退到矩形地面
             pygame.draw.rect(screen, GROUND_COLOR, 
                            (0, SCREEN_HEIGHT - self.ground_height, GAME_WIDTH, self.ground_height))
             pygame.draw.rect(screen, GROUND_COLOR, 
-                           (self.ground_x + GAME_WIDTH, SCREEN_HEIGHT - self.ground_height, 
+                           (ground_x + GAME_WIDTH, SCREEN_HEIGHT - self.ground_height, 
                             GAME_WIDTH, self.ground_height))
 
-class Camera:
-    def __init__(self):
-        # 相机设置
-        self.current_camera_index = 0
-        self.max_camera_index = 3  # 尝试最多4个相机索引（0-3）
-        self.cap = None
-        self.connect_to_camera(self.current_camera_index)
-        
-        # 如果没有找到可用相机，尝试其他索引
-        if self.cap is None or not self.cap.isOpened():
-            for camera_index in range(self.max_camera_index):
-                if self.connect_to_camera(camera_index):
-                    self.current_camera_index = camera_index
-                    break
-        
-        # 手势检测相关参数
-        self.position_history = deque(maxlen=5)  # 减少帧数以更快地检测手势
-        self.last_jump_time = 0  # 上次跳跃的时间戳
-        self.jump_cooldown = 0.3  # 减少冷却时间使手势检测更频繁
-        self.min_gesture_distance = 50  # 降低阈值，增加灵敏度
-        self.is_gesture_detected = False
-    
-    def connect_to_camera(self, camera_index):
-        """连接到指定索引的相机"""
-        try:
-            # 释放之前的相机
-            if self.cap is not None:
-                self.cap.release()
-                
-            # 尝试连接新相机
-            self.cap = cv2.VideoCapture(camera_index)
-            
-            # 检查相机是否成功打开
-            if self.cap.isOpened():
-                self.current_camera_index = camera_index
-                # 设置相机分辨率
-                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
-                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, SCREEN_HEIGHT)
-                print(f"成功连接到相机 {camera_index}")
-                return True
-            else:
-                print(f"无法连接到相机 {camera_index}")
-                return False
-        except Exception as e:
-            print(f"连接相机 {camera_index} 时出错: {e}")
-            return False
-    
-    def switch_camera(self):
-        """切换到下一个相机"""
-        next_index = (self.current_camera_index + 1) % (self.max_camera_index + 1)
-        
-        # 尝试所有可能的相机索引
-        for i in range(self.max_camera_index + 1):
-            index = (next_index + i) % (self.max_camera_index + 1)
-            if self.connect_to_camera(index):
-                # 清除历史记录
-                self.position_history.clear()
-                self.is_gesture_detected = False
-                return True
-                
-        return False
-    
-    def capture_frame(self):
-        """捕获并处理相机画面"""
-        # 检查相机是否正确初始化
-        if self.cap is None or not self.cap.isOpened():
-            self.cap = cv2.VideoCapture(0)  # 尝试重新打开相机
-            if not self.cap.isOpened():
-                # 如果相机不可用，创建一个空白画面
-                blank_frame = np.zeros((SCREEN_HEIGHT, CAMERA_WIDTH, 3), dtype=np.uint8)
-                # 在空白画面上添加文本
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                cv2.putText(blank_frame, "Camera not available", (50, SCREEN_HEIGHT//2), 
-                           font, 1, (255, 255, 255), 2, cv2.LINE_AA)
-                cv2.putText(blank_frame, "Press G to use keyboard", (50, SCREEN_HEIGHT//2 + 40), 
-                           font, 1, (255, 255, 255), 2, cv2.LINE_AA)
-                return self.convert_to_surface(blank_frame), False
-                
-        success, frame = self.cap.read()
-        if not success:
-            # 如果读取失败，返回上一次成功的帧或空白帧
-            blank_frame = np.zeros((SCREEN_HEIGHT, CAMERA_WIDTH, 3), dtype=np.uint8)
-            cv2.putText(blank_frame, "Camera feed unavailable", (50, SCREEN_HEIGHT//2), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2, cv2.LINE_AA)
-            return self.convert_to_surface(blank_frame), False
-            
-        # 翻转画面(镜像), 使其符合用户直觉
-        frame = cv2.flip(frame, 1)
-        
-        # 调整画面大小以适应显示区域
-        try:
-            frame = cv2.resize(frame, (CAMERA_WIDTH, SCREEN_HEIGHT))
-        except Exception:
-            # 如果调整大小失败，创建一个默认大小的空白帧
-            frame = np.zeros((SCREEN_HEIGHT, CAMERA_WIDTH, 3), dtype=np.uint8)
-        
-        # 使用Mediapipe检测手部
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(frame_rgb)
-        
-        jump_triggered = False
-        
-        # 如果检测到手部
-        if results.multi_hand_landmarks:
-            hand_landmarks = results.multi_hand_landmarks[0]  # 获取第一只检测到的手
-            
-            # 绘制手部骨架
-            mp_drawing.draw_landmarks(
-                frame,
-                hand_landmarks,
-                mp_hands.HAND_CONNECTIONS,
-                mp_drawing_styles.get_default_hand_landmarks_style(),
-                mp_drawing_styles.get_default_hand_connections_style()
-            )
-            
-            # 获取手掌中心点(使用食指根部关节作为参考点)
-            index_base = hand_landmarks.landmark[5]  # 食指根部关键点
-            x = int(index_base.x * CAMERA_WIDTH)
-            y = int(index_base.y * SCREEN_HEIGHT)
-            hand_position = (x, y)
-            
-            # 将当前手部位置添加到历史记录
-            self.position_history.append(hand_position)
-            
-            # 可视化手部运动轨迹
-            if len(self.position_history) > 1:
-                # 绘制运动轨迹线
-                for i in range(1, len(self.position_history)):
-                    prev_point = self.position_history[i-1]
-                    curr_point = self.position_history[i]
-                    # 轨迹线颜色从蓝到红，表示时间
-                    color_intensity = int(255 * i / len(self.position_history))
-                    line_color = (255-color_intensity, 0, color_intensity)
-                    cv2.line(frame, prev_point, curr_point, line_color, 2)
-                
-                # 显示当前移动距离指示器
-                if len(self.position_history) >= 3:
-                    first_pos = self.position_history[-3]
-                    last_pos = self.position_history[-1]
-                    distance = abs(last_pos[0] - first_pos[0]) + abs(last_pos[1] - first_pos[1]) * 0.3
-                    
-                    # 在画面上显示移动距离与阈值的对比
-                    threshold_ratio = min(distance / self.min_gesture_distance, 1.0)
-                    bar_width = 100
-                    bar_height = 20
-                    bar_x = 20
-                    bar_y = 20
-                    
-                    # 绘制阈值条背景
-                    cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height), (50, 50, 50), -1)
-                    # 绘制当前移动距离
-                    filled_width = int(bar_width * threshold_ratio)
-                    
-                    # 颜色从绿到红
-                    if threshold_ratio < 0.7:
-                        bar_color = (0, 255, 0)  # 绿色
-                    elif threshold_ratio < 0.9:
-                        bar_color = (0, 255, 255)  # 黄色
-                    else:
-                        bar_color = (0, 0, 255)  # 红色
-                        
-                    cv2.rectangle(frame, (bar_x, bar_y), (bar_x + filled_width, bar_y + bar_height), bar_color, -1)
-            
-            # 如果有足够的历史记录，检测挥手手势
-            if len(self.position_history) >= 3:  # 只需要3帧就开始检测
-                jump_triggered = self.detect_wave_gesture()
-                
-            # 添加当前位置的可视化标记
-            cv2.circle(frame, hand_position, 10, (0, 255, 0), -1)  # 绿色圆点标记当前位置
-        else:
-            # 如果没有检测到手，清空历史记录
-            self.position_history.clear()
-            self.is_gesture_detected = False
-        
-        # 使用辅助方法转换为Pygame可用的Surface
-        surface = self.convert_to_surface(frame)
-        return surface, jump_triggered
-    
-    def detect_wave_gesture(self):
-        """检测挥手手势，返回是否触发跳跃"""
-        current_time = time.time()
-        
-        # 如果还在冷却时间内，不触发跳跃
-        if current_time - self.last_jump_time < self.jump_cooldown:
-            return False
-            
-        # 计算手部位置的移动
-        if len(self.position_history) < 3:  # 确保至少有3个点来计算移动
-            return False
-            
-        # 使用最近的几个点来计算移动
-        recent_pos = self.position_history[-3]
-        last_pos = self.position_history[-1]
-        
-        # 计算水平和垂直移动距离
-        x_distance = abs(last_pos[0] - recent_pos[0])
-        y_distance = abs(last_pos[1] - recent_pos[1])
-        
-        # 计算总移动距离，同时考虑水平和一部分垂直移动
-        # 这样可以让斜向的手势也能触发跳跃
-        total_movement = x_distance + (y_distance * 0.3)
-        
-        # 检测是否有足够的移动
-        if total_movement > self.min_gesture_distance and not self.is_gesture_detected:
-            self.is_gesture_detected = True
-            self.last_jump_time = current_time
-            return True
-        
-        # 如果手部相对静止，更快地重置手势检测状态
-        if total_movement < self.min_gesture_distance * 0.2:
-            self.is_gesture_detected = False
-            
-        return False
-    
-    def release(self):
-        """释放相机资源"""
-        try:
-            if self.cap is not None and self.cap.isOpened():
-                self.cap.release()
-        except Exception as e:
-            print(f"Error releasing camera: {e}")
-        
-    def convert_to_surface(self, frame):
-        """将OpenCV图像转换为Pygame Surface"""
+class FrameConverter:
+    """
+    将OpenCV的BGR画面写入一个常驻的 Surface
+    frombuffer 按BGR格式直接包装numpy内存（不拷贝），再由一次blit完成通道重排，
+    不需要额外的颜色转换、旋转或翻转，也不会每帧分配新的画面Surface。
+    """
+    def __init__(self, width=CAMERA_WIDTH, height=SCREEN_HEIGHT):
+        self.size = (width, height)
+        self.surface = pygame.Surface(self.size)
+
+    def convert(self, frame):
+        """把一帧画面写入常驻Surface并返回它"""
         try:
-            # 转换为Pygame可用的Surface
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = np.rot90(frame)  # 旋转以适应Pygame坐标系
-            frame = np.flipud(frame)  # 翻转以适应Pygame坐标系
-            surface = pygame.surfarray.make_surface(frame)
-            return surface
+            if (frame.shape[1], frame.shape[0]) != self.size:
+                import cv2  # 只有尺寸不一致时才需要
+                frame = cv2.resize(frame, self.size)
+            frame = np.ascontiguousarray(frame)  # 已经连续时不会拷贝
+            self.surface.blit(pygame.image.frombuffer(frame, self.size, "BGR"), (0, 0))
         except Exception as e:
             print(f"Error converting frame to surface: {e}")
-            # 创建一个空的surface
-            surface = pygame.Surface((CAMERA_WIDTH, SCREEN_HEIGHT))
-            surface.fill(BLACK)
+            self.surface.fill(BLACK)
             font = pygame.font.SysFont(None, 36)
             text = font.render("Camera Error", True, WHITE)
-            surface.blit(text, (CAMERA_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2))
-            return surface
+            self.surface.blit(text, (self.size[0]//2 - text.get_width()//2, self.size[1]//2))
+        return self.surface
 
-class Bird:
-    def __init__(self):
-        self.x = 200
-        self.y = SCREEN_HEIGHT // 2
-        # 加载小鸟图像
-        try:
-            self.image = pygame.image.load("assets/sprites/redbird-midflap.png").convert_alpha()
-            # 缩放图像到合适大小
-            self.image = pygame.transform.scale(self.image, (40, 30))
-        except Exception as e:
-            print(f"无法加载小鸟图像: {e}")
-            # 回退到矩形绘制
-            self.image = None
-            self.color = (255, 255, 0)  # 黄色小鸟
-            
-        self.width = 40
-        self.height = 30
-        self.velocity = 0
-        self.gravity = 0.8
-        self.jump_strength = -12
-        self.angle = 0  # 旋转角度
-        self.max_angle = 30  # 最大旋转角度
-        self.min_angle = -90  # 最小旋转角度
-        self.rotation_speed = 5  # 旋转速度
-        
-    def jump(self):
-        self.velocity = self.jump_strength
-        self.angle = self.max_angle  # 跳跃时向上旋转
-        jump_sound.play()
-        
-    def update(self):
-        # 应用重力
-        self.velocity += self.gravity
-        self.y += self.velocity
-        
-        # 更新旋转角度
-        if self.velocity < 0:  # 上升时
-            self.angle = min(self.max_angle, self.angle + self.rotation_speed)
-        else:  # 下降时
-            self.angle = max(self.min_angle, self.angle - self.rotation_speed)
-        
-        # 防止小鸟飞出屏幕顶部
-        if self.y < 0:
-            self.y = 0
-            self.velocity = 0
-            
-    def draw(self, screen):
-        if self.image is not None:
-            # 旋转图像
-            rotated_image = pygame.transform.rotate(self.image, self.angle)
-            rotated_rect = rotated_image.get_rect(center=(self.x + self.width//2, self.y + self.height//2))
-            screen.blit(rotated_image, rotated_rect)
+class CameraWorker:
+    """
+    在后台线程中运行相机采集与手势识别。
+    主循环通过 poll() 非阻塞地读取最新结果，旧帧直接丢弃，
+    因此物理与绘制可以不受相机速度影响，以满帧率运行。
+    画面只在主线程中、且只在有新帧时写入常驻Surface，避免与绘制发生竞争。
+    Camera（连同 OpenCV、Mediapipe 的导入和相机探测）也在后台线程中创建，不会阻塞游戏窗口。
+    """
+    def __init__(self, camera_index=None, camera_options=None):
+        self.camera = None  # 由后台线程创建
+        self._camera_index = camera_index
+        self._camera_options = camera_options or {}
+        self.converter = FrameConverter(CAMERA_WIDTH, SCREEN_HEIGHT)
+        self._lock = threading.Lock()
+        self._active = threading.Event()  # 手势控制关闭时暂停采集
+        self._running = False
+        self._thread = None
+        self._frame = None  # 最新一帧画面（BGR）
+        self._landmarks = None  # 最新一帧每名玩家的手部关键点 (NUM_LANDMARKS, 3)，没有检测到手时为 None
+        self._frame_count = 0  # 后台线程已发布的帧数
+        self._converted_frame = None  # 最近一次转换为 Surface 的画面
+        self._jump_pending = 0  # 自上次读取以来触发过跳跃的玩家位掩码
+        self._jump_time = None  # 未读取的跳跃中最早一次的画面采集时间
+        self.jump_capture_time = None  # poll() 返回的跳跃对应的画面采集时间 (time.time())
+        self._switch_requested = False
+        self.frame_id = 0  # poll() 返回的画面对应的帧号
+        self.landmarks = None  # poll() 返回的画面中每名玩家的手部关键点
+        self.error = None  # 后台线程中发生的异常
+
+    def start(self):
+        """启动后台采集线程"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._active.set()
+        self._thread = threading.Thread(target=self._run, name="camera-worker", daemon=True)
+        self._thread.start()
+
+    def set_active(self, active):
+        """暂停或恢复采集"""
+        if active:
+            self._active.set()
         else:
-            # 回退到矩形绘制
-            bird_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            pygame.draw.rect(bird_surface, self.color, (0, 0, self.width, self.height))
-            rotated_surface = pygame.transform.rotate(bird_surface, self.angle)
-            rotated_rect = rotated_surface.get_rect(center=(self.x + self.width//2, self.y + self.height//2))
-            screen.blit(rotated_surface, rotated_rect)
-        
-    def get_mask(self):
-        # 使用图像边界作为碰撞检测
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+            self._active.clear()
 
-class Pipe:
-    def __init__(self):
-        self.gap = 300  # 增加水管空隙，使游戏更容易些
-        self.width = 80
-        self.speed = 4  # 水管移动速度
-        self.passed = False
-        
-        # 加载水管图像
+    def request_switch(self):
+        """请求切换相机，实际切换在后台线程中完成，避免与采集竞争"""
+        with self._lock:
+            self._switch_requested = True
+
+    def _run(self):
         try:
-            self.pipe_img = pygame.image.load("assets/sprites/pipe-green.png").convert_alpha()
-            self.pipe_img = pygame.transform.scale(self.pipe_img, (self.width, SCREEN_HEIGHT))
-            # 创建上方水管的镜像
-            self.top_pipe_img = pygame.transform.flip(self.pipe_img, False, True)
+            from camera import Camera, landmark_array
+            self.camera = Camera(CAMERA_WIDTH, SCREEN_HEIGHT, camera_index=self._camera_index,
+                                 **self._camera_options)
         except Exception as e:
-            print(f"无法加载水管图像: {e}")
-            self.pipe_img = None
-            self.top_pipe_img = None
-            self.color = GREEN  # 回退到矩形绘制
-        
-        # 随机生成水管位置
-        self.top_height = random.randint(50, SCREEN_HEIGHT - self.gap - 50)
-        self.bottom_height = SCREEN_HEIGHT - self.top_height - self.gap
-        
-        self.x = GAME_WIDTH
-        self.top_rect = pygame.Rect(self.x, 0, self.width, self.top_height)
-        self.bottom_rect = pygame.Rect(self.x, SCREEN_HEIGHT - self.bottom_height, self.width, self.bottom_height)
-    
-    def update(self):
-        self.x -= self.speed
-        self.top_rect.x = self.x
-        self.bottom_rect.x = self.x
-        
-    def draw(self, screen):
-        if self.pipe_img is not None and self.top_pipe_img is not None:
-            # 绘制上方水管(镜像)
-            top_pipe = pygame.transform.scale(self.top_pipe_img, (self.width, self.top_height))
-            screen.blit(top_pipe, (self.x, 0))
-            
-            # 绘制下方水管
-            bottom_pipe = pygame.transform.scale(self.pipe_img, (self.width, self.bottom_height))
-            screen.blit(bottom_pipe, (self.x, SCREEN_HEIGHT - self.bottom_height))
+            self.error = e
+            return
+
+        frame_interval = 1.0 / FPS
+        while self._running:
+            # 暂停期间阻塞等待，避免空转占用CPU
+            if not self._active.wait(timeout=0.1):
+                continue
+            start = time.perf_counter()
+            try:
+                with self._lock:
+                    switch_requested = self._switch_requested
+                    self._switch_requested = False
+                if switch_requested:
+                    self.camera.switch_camera()
+
+                frame, jump_triggered = self.camera.capture_frame()
+            except Exception as e:
+                self.error = e
+                break
+            for stage, seconds in self.camera.stage_times.items():
+                profiler.record(f"camera.{stage}", seconds)
+
+            landmarks = [landmark_array(hand_landmarks) if hand_landmarks is not None else None
+                         for hand_landmarks in self.camera.last_player_landmarks]
+
+            # 只保留最新一帧，但跳跃信号会一直保留到主循环读取为止
+            with self._lock:
+                if frame is not None:
+                    self._frame = frame
+                    self._landmarks = landmarks
+                if jump_triggered and not self._jump_pending:
+                    self._jump_time = self.camera.last_frame_time
+                self._jump_pending |= jump_triggered
+                self._frame_count += 1
+
+            # 相机不可用时 capture_frame 会立即返回，限制循环频率防止空转
+            elapsed = time.perf_counter() - start
+            if elapsed < frame_interval:
+                time.sleep(frame_interval - elapsed)
+
+    @property
+    def camera_index(self):
+        """当前相机索引，相机尚未初始化完成时为 None"""
+        if self.camera is None:
+            return None
+        return self.camera.current_camera_index
+
+    def poll(self):
+        """非阻塞地获取最新结果，返回 (surface, jump_triggered)，jump_triggered 为触发跳跃的玩家位掩码"""
+        with self._lock:
+            frame = self._frame
+            landmarks = self._landmarks
+            frame_count = self._frame_count
+            jump_triggered = self._jump_pending
+            self._jump_pending = 0
+            if jump_triggered:
+                self.jump_capture_time = self._jump_time
+        if frame is None:
+            return None, jump_triggered
+        # 已发布的帧不会再被修改，可以在锁外转换；
+        # 相机不可用时每次发布的是同一个缓存的占位画面，不需要重复转换
+        if frame_count != self.frame_id:
+            if frame is not self._converted_frame:
+                with profiler.measure("convert"):
+                    self.converter.convert(frame)
+                self._converted_frame = frame
+            self.frame_id = frame_count
+            self.landmarks = landmarks
+        return self.converter.surface, jump_triggered
+
+    def stop(self):
+        """停止后台线程并释放相机"""
+        self._running = False
+        self._active.set()  # 唤醒可能处于暂停状态的线程
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.camera is not None:
+            self.camera.release()
+
+class ProcessCameraWorker:
+    """
+    多进程模式的采集器，接口与 CameraWorker 相同。
+    采集与识别在独立进程中运行，完全不占用游戏进程的GIL；
+    画面通过共享内存传递，每个槽位预先包装成一个 Surface，之后每帧都不再分配或拷贝。
+    """
+    def __init__(self, camera_index=None, camera_options=None):
+        # 游戏进程只需要共享内存的布局，Mediapipe 只在检测进程中导入
+        from camera import CAMERA_STAGES
+        from detector_process import DetectorProcess
+        self.camera_stages = CAMERA_STAGES
+        self.num_players = (camera_options or {}).get("num_players", 1)
+        self.detector = DetectorProcess(camera_index, width=CAMERA_WIDTH, height=SCREEN_HEIGHT,
+                                        camera_options=camera_options)
+        # frombuffer 创建的 Surface 直接引用共享内存中的像素
+        self._surfaces = [
+            pygame.image.frombuffer(frame, (CAMERA_WIDTH, SCREEN_HEIGHT), "RGB")
+            for frame in self.detector.ring.frames
+        ]
+        self.frame_id = -1  # 最近读取的帧序号
+        self.landmarks = None  # 最近一帧每名玩家的手部关键点 (NUM_LANDMARKS, 3)，没有检测到手时为 None
+        self.jump_capture_time = None  # poll() 返回的跳跃对应的画面采集时间 (time.time())
+
+    def start(self):
+        self.detector.start()
+
+    def set_active(self, active):
+        self.detector.set_active(active)
+
+    def request_switch(self):
+        self.detector.request_switch()
+
+    @property
+    def camera_index(self):
+        return self.detector.camera_index
+
+    @property
+    def error(self):
+        if self.detector.failed:
+            return RuntimeError("手势检测进程已退出")
+        return None
+
+    def poll(self):
+        """非阻塞地获取最新结果，返回 (surface, jump_triggered)，jump_triggered 为触发跳跃的玩家位掩码"""
+        slot, record, new_jumps = self.detector.poll()
+        if new_jumps:
+            self.jump_capture_time = self.detector.jump_timestamp
+        if slot is None:
+            return None, new_jumps
+        seq = int(record["seq"])
+        if seq != self.frame_id:
+            # 只能统计到被读取的帧，检测进程中被跳过的帧不计入
+            for stage, seconds in zip(self.camera_stages, record["stage_times"]):
+                if not np.isnan(seconds):
+                    profiler.record(f"camera.{stage}", float(seconds))
+            # 槽位之后会被改写，关键点需要复制出来
+            self.landmarks = [record["landmarks"][player].copy() if record["has_hand"][player] else None
+                              for player in range(self.num_players)]
+        self.frame_id = seq
+        return self._surfaces[slot], new_jumps
+
+    def stop(self):
+        """停止检测进程并回收共享内存"""
+        self._surfaces = None
+        self.landmarks = None
+        self.detector.stop()
+
+# 手部叠加层的颜色 (RGB)
+OVERLAY_BONE_COLOR = (224, 224, 224)
+OVERLAY_JOINT_COLOR = (255, 48, 48)
+OVERLAY_POSITION_COLOR = (0, 255, 0)
+# 多人模式下每名玩家当前位置的颜色，与 BIRD_COLORS 对应
+OVERLAY_PLAYER_COLORS = ((255, 64, 64), (64, 160, 255), (255, 220, 0))
+# 移动距离指示条的位置和尺寸，多人模式下每名玩家一条，依次向下排列
+OVERLAY_BAR_RECT = (20, 20, 100, 20)
+OVERLAY_BAR_SPACING = 30
+
+class HandOverlay:
+    """
+    相机区域的手部叠加层：骨架、运动轨迹、移动距离指示条和当前位置。
+    根据采集器提供的关键点用 pygame 绘制在独立的透明图层上，只在有新关键点时重新绘制，
+    相机画面本身不做任何修改。多人模式下每名玩家的手分别绘制。
+    """
+    HISTORY_LENGTH = 5  # 与 WaveDetector.position_history 的长度一致
+
+    def __init__(self, size=(CAMERA_WIDTH, SCREEN_HEIGHT)):
+        self.size = size
+        self.layer = pygame.Surface(size, pygame.SRCALPHA)
+        self.histories = []  # 每名玩家食指根部的像素位置
+        self.points = []  # 每名玩家当前关键点的像素坐标，没有检测到手时为 None
+        self.dirty = False
+        # 来自 camera 模块的常量，第一次收到关键点时（相机已经加载）才导入，之后直接使用
+        self.tracked_landmark = None
+        self.hand_connections = ()
+        self.min_gesture_distance = None
+
+    def update(self, player_landmarks):
+        """
+        每个新画面调用一次，player_landmarks 为每名玩家 (NUM_LANDMARKS, 3) 的归一化坐标，
+        没有检测到手的玩家为 None；整个参数为 None 时清空叠加层
+        """
+        if player_landmarks is None:
+            if not self.points and not self.histories:
+                return
+            self.points = []
+            self.histories = []
+            self.dirty = True
+            return
+
+        if self.tracked_landmark is None:
+            from camera import HAND_CONNECTIONS, MIN_GESTURE_DISTANCE, TRACKED_LANDMARK
+            self.tracked_landmark = TRACKED_LANDMARK
+            self.hand_connections = HAND_CONNECTIONS
+            self.min_gesture_distance = MIN_GESTURE_DISTANCE
+
+        width, height = self.size
+        while len(self.histories) < len(player_landmarks):
+            self.histories.append(deque(maxlen=self.HISTORY_LENGTH))
+        del self.histories[len(player_landmarks):]
+        points = []
+        for landmarks, history in zip(player_landmarks, self.histories):
+            if landmarks is None:
+                history.clear()
+                points.append(None)
+                continue
+            hand_points = [(int(x * width), int(y * height)) for x, y, _ in landmarks]
+            history.append(hand_points[self.tracked_landmark])
+            points.append(hand_points)
+        # 前后两帧都没有检测到手时叠加层不变
+        changed = any(hand_points is not None for hand_points in points + self.points)
+        self.points = points
+        self.dirty = self.dirty or changed
+
+    def draw(self, screen, position):
+        if self.dirty:
+            self.render()
+            self.dirty = False
+        if any(points is not None for points in self.points):
+            screen.blit(self.layer, position)
+
+    def render(self):
+        layer = self.layer
+        layer.fill((0, 0, 0, 0))
+        multiplayer = len(self.points) > 1
+        for player, (points, history) in enumerate(zip(self.points, self.histories)):
+            if points is None:
+                continue
+            position_color = OVERLAY_PLAYER_COLORS[player] if multiplayer else OVERLAY_POSITION_COLOR
+            self.render_hand(layer, points, history, player, position_color)
+
+    def render_hand(self, layer, points, history, player, position_color):
+        """绘制一名玩家的手，指示条按玩家编号向下排列"""
+        # 手部骨架
+        for start, end in self.hand_connections:
+            pygame.draw.line(layer, OVERLAY_BONE_COLOR, points[start], points[end], 2)
+        for point in points:
+            pygame.draw.circle(layer, OVERLAY_JOINT_COLOR, point, 4)
+
+        # 运动轨迹，颜色从蓝到红表示时间
+        for i in range(1, len(history)):
+            intensity = int(255 * i / len(history))
+            pygame.draw.line(layer, (intensity, 0, 255 - intensity), history[i-1], history[i], 2)
+
+        # 移动距离与挥手阈值的对比，计算方式与 WaveDetector.detect_wave_gesture 相同
+        if len(history) >= 3:
+            first_pos, last_pos = history[-3], history[-1]
+            distance = abs(last_pos[0] - first_pos[0]) + abs(last_pos[1] - first_pos[1]) * 0.3
+            threshold_ratio = min(distance / self.min_gesture_distance, 1.0)
+            bar_x, bar_y, bar_width, bar_height = OVERLAY_BAR_RECT
+            bar_y += player * OVERLAY_BAR_SPACING
+            pygame.draw.rect(layer, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
+            # 颜色从绿到红
+            if threshold_ratio < 0.7:
+                bar_color = (0, 255, 0)
+            elif threshold_ratio < 0.9:
+                bar_color = (255, 255, 0)
+            else:
+                bar_color = (255, 0, 0)
+            pygame.draw.rect(layer, bar_color, (bar_x, bar_y, int(bar_width * threshold_ratio), bar_height))
+
+        # 当前位置
+        pygame.draw.circle(layer, position_color, history[-1], 10)
+
+@functools.lru_cache(maxsize=None)
+def bird_rotation_table(path):
+    """
+    预先生成小鸟在所有角度下的旋转图像
+    返回 {角度: (旋转后的图像, 相对中心点的左上角偏移)}，path 为 None 或加载失败时使用黄色矩形
+    """
+    size = (DEFAULT_SIM_CONFIG.bird_width, DEFAULT_SIM_CONFIG.bird_height)
+    image = assets.image(path, size) if path is not None else None
+    if image is None:
+        # 回退到矩形绘制
+        image = pygame.Surface(size, pygame.SRCALPHA)
+        pygame.draw.rect(image, BirdSprite.COLOR, (0, 0) + size)
+
+    table = {}
+    for angle in range(DEFAULT_SIM_CONFIG.min_angle, DEFAULT_SIM_CONFIG.max_angle + 1):
+        rotated_image = pygame.transform.rotate(image, angle)
+        rotated_rect = rotated_image.get_rect(center=(0, 0))
+        table[angle] = (rotated_image, rotated_rect.topleft)
+    return table
+
+class BirdSprite:
+    """绘制模拟中的小鸟，旋转后的图像全部来自预先生成的查找表"""
+    COLOR = (255, 255, 0)  # 图像加载失败时使用的黄色
+    FLAP_FRAME_TICKS = 5  # 扇翅动画每帧持续的逻辑帧数
+
+    def __init__(self, flap_animation=False, color=BIRD_COLORS[0]):
+        # 从缓存获取预先旋转好的小鸟图像，绘制时只需查表
+        if flap_animation:
+            self.rotation_tables = [bird_rotation_table(path.format(color=color)) for path in BIRD_FLAP_IMAGES]
         else:
-            # 回退到矩形绘制
-            pygame.draw.rect(screen, self.color, self.top_rect)
-            pygame.draw.rect(screen, self.color, self.bottom_rect)
+            self.rotation_tables = [bird_rotation_table(BIRD_IMAGE.format(color=color))]
+            
+    def draw(self, screen, bird, tick, alpha=1.0):
+        # 查表获取当前动画帧和角度对应的图像，不做任何变换
+        frame = (tick // self.FLAP_FRAME_TICKS) % len(self.rotation_tables)
+        rotated_image, (offset_x, offset_y) = self.rotation_tables[frame][int(bird.angle)]
+        # 在上一逻辑帧与当前逻辑帧的位置之间插值
+        y = bird.prev_y + (bird.y - bird.prev_y) * alpha
+        center_x = round(bird.x + bird.width//2)
+        center_y = round(y + bird.height//2)
+        screen.blit(rotated_image, (center_x + offset_x, center_y + offset_y))
+
+# 水管图像缓存的容量，水管高度的取值有限，所有水管共享同一个缓存
+PIPE_SURFACE_CACHE_SIZE = 128
+
+@functools.lru_cache(maxsize=PIPE_SURFACE_CACHE_SIZE)
+def pipe_surface(height, top):
+    """
+    获取缩放到指定高度的水管图像，top 为 True 时返回上方（镜像）水管
+    水管创建后高度不再变化，每种高度只需缩放一次
+    """
+    width = DEFAULT_SIM_CONFIG.pipe_width
+    image = assets.image(PIPE_IMAGE, (width, SCREEN_HEIGHT), flip=top)
+    if image is None:
+        return None
+    return pygame.transform.scale(image, (width, height))
+
+def draw_pipe(screen, x, prev_x, top_height, bottom_height, alpha=1.0):
+    """绘制模拟中的一对水管（参数来自 Simulation.pipes()），alpha 为两个逻辑帧之间的插值系数"""
+    x = prev_x + (x - prev_x) * alpha
+    # 从缓存获取已缩放到对应高度的水管图像，上方水管为镜像
+    top_pipe_img = pipe_surface(top_height, True)
+    pipe_img = pipe_surface(bottom_height, False)
+    if pipe_img is not None and top_pipe_img is not None:
+        # 绘制上方水管(镜像)，图像已缩放好，这里只做blit
+        screen.blit(top_pipe_img, (x, 0))
         
-    def collide(self, bird_rect):
-        return bird_rect.colliderect(self.top_rect) or bird_rect.colliderect(self.bottom_rect)
+        # 绘制下方水管
+        screen.blit(pipe_img, (x, SCREEN_HEIGHT - bottom_height))
+    else:
+        # 回退到矩形绘制
+        width = DEFAULT_SIM_CONFIG.pipe_width
+        pygame.draw.rect(screen, GREEN, (x, 0, width, top_height))
+        pygame.draw.rect(screen, GREEN, (x, SCREEN_HEIGHT - bottom_height, width, bottom_height))
+
+# 多人键盘模式下每名玩家的跳跃键
+PLAYER_KEYS = (pygame.K_SPACE, pygame.K_RETURN, pygame.K_UP)
 
 class Game:
-    def __init__(self, camera_index=None):
-        self.state = "welcome"  # welcome, playing, game_over
-        self.score = 0
-        self.bird = Bird()
-        self.pipes = []
-        self.pipe_timer = 0
-        self.pipe_frequency = 6000  # 毫秒，增大间隔，减少频率
-        self.initial_delay = 1000  # 开始游戏后延迟一段时间再生成第一个水管
+    def __init__(self, camera_index=None, camera_mode="thread", flap_animation=False, camera_options=None,
+                 seed=None, record_dir=None, gesture_control=True, players=1):
+        # 这里只创建贯穿整个运行期间的资源（图像、相机、手势识别），每局的状态在 reset() 中初始化
+        self.flap_animation = flap_animation
         self.background = Background()
-        self.base_speed = 4  # 基础速度
-        self.difficulty_interval = 5  # 每5分增加难度
+        # 多人模式下每名玩家一只不同颜色的小鸟，共享同一片水管
+        self.players = players
+        self.bird_sprites = [BirdSprite(flap_animation, color) for color in BIRD_COLORS[:players]]
+
+        # 没有指定种子时每局随机选择一个，并记录下来以便复现
+        self.fixed_seed = seed
+
+        # 录像：开始游戏时创建，记录每个逻辑帧的跳跃操作
+        self.record_dir = record_dir
+        self.recorder = None
         
-        # 初始化相机，如果提供了索引则使用该索引
-        self.camera = Camera()  
-        if camera_index is not None:
-            self.camera.connect_to_camera(camera_index)
-            
         self.camera_surface = None  # 存储相机画面
-        self.use_gesture_control = True  # 是否使用手势控制
+        self.camera_frame_id = -1  # 当前相机画面的帧号，用于判断画面是否更新
+        self.show_profiler = False  # 是否显示性能面板
+        self.profiler_hud = ProfilerHud(profiler)
+        self.show_hand_overlay = True  # 是否在相机画面上显示手部骨架和轨迹
+        self.hand_overlay = HandOverlay()
+        self.use_gesture_control = gesture_control  # 是否使用手势控制
+
+        # 相机采集与手势识别不阻塞游戏循环：
+        # thread 模式在后台线程中运行，process 模式在独立进程中运行并通过共享内存传递画面
+        # camera_options 为传给 Camera 的额外参数（识别分辨率等）
+        # 关闭手势控制时不创建采集器，第一次按G开启时才加载相机和手势识别
+        # 多人模式下同一次识别最多检测 players 只手，每只手控制一只小鸟
+        self.camera_mode = camera_mode
+        self.camera_options = dict(camera_options or {}, num_players=players)
+        self.camera_worker = None
+        if gesture_control:
+            self.start_camera(camera_index)
+
+        self.reset()
+
+    def reset(self):
+        """重置一局游戏的状态（小鸟、水管、分数、计时），相机和已加载的资源保持不变"""
+        self.state = "welcome"  # welcome, playing, game_over
+        self.background.reset()
+
+        # 每局使用独立的随机数生成器，相同的种子和操作总能得到相同的对局
+        self.seed = self.fixed_seed if self.fixed_seed is not None else random.randrange(2**63)
+
+        # 小鸟物理、水管、碰撞、计分和难度都由纯逻辑的模拟核心负责，这里只负责绘制、声音和输入
+        config = SimConfig(ground_height=self.background.ground_height, num_birds=self.players)
+        self.sim = Simulation(config, random.Random(self.seed))
+        self.jump_requested = 0  # 下一逻辑帧跳跃的小鸟位掩码
+        self.jump_capture_time = None  # 手势跳跃对应的画面采集时间，用于统计延迟
+        self.accumulator = 0.0  # 尚未模拟的时间（秒）
+        self.alpha = 1.0  # 绘制时在上一逻辑帧与当前逻辑帧之间的插值系数
+        self.redraw_all = True  # 脏矩形模式下是否需要完整重绘
+
+    def start_camera(self, camera_index=None):
+        """创建并启动采集器，相机的初始化在后台完成，这里立即返回"""
+        if self.camera_mode == "process":
+            self.camera_worker = ProcessCameraWorker(camera_index, self.camera_options)
+        else:
+            self.camera_worker = CameraWorker(camera_index, self.camera_options)
+        self.camera_worker.start()
+
+    def stop_camera(self):
+        """停止采集器并释放相机"""
+        if self.camera_worker is not None:
+            self.camera_worker.stop()
+            self.camera_worker = None
+            self.hand_overlay.update(None)
+
+    @property
+    def camera_index(self):
+        """当前相机索引，没有采集器或相机尚未就绪时为 None"""
+        if self.camera_worker is None:
+            return None
+        return self.camera_worker.camera_index
+
+    def restart(self):
+        """重新开始游戏，相机、手势识别和图像资源继续使用，不重新初始化"""
+        self.stop_recording()
+        self.reset()
+        self.start_playing()
+
+    def start_playing(self):
+        """进入游戏状态，需要时开始录像"""
+        self.state = "playing"
+        if self.record_dir is not None and self.recorder is None:
+            os.makedirs(self.record_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.seed}"
+            path = os.path.join(self.record_dir, f"{name}.replay")
+            count = 1
+            while os.path.exists(path):  # 固定种子时同一秒内可能开始多局
+                count += 1
+                path = os.path.join(self.record_dir, f"{name}-{count}.replay")
+            self.recorder = ReplayRecorder(path, self.seed, self.sim.config)
+
+    def stop_recording(self):
+        """结束录像，对局已结束时写入最终分数"""
+        if self.recorder is None:
+            return
+        if self.sim.done:
+            self.recorder.finish(self.sim.tick, self.sim.score)
+            print(f"录像已保存: {self.recorder.path}")
+        else:
+            self.recorder.close()
+        self.recorder = None
         
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                self.camera.release()  # 释放相机资源
+                self.stop_camera()  # 停止采集线程并释放相机资源
+                self.stop_recording()
                 pygame.quit()
                 sys.exit()
+
+            # 窗口被遮挡后重新显示，需要完整重绘
+            if event.type == pygame.WINDOWEXPOSED:
+                self.redraw_all = True
                 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
+                if event.key in PLAYER_KEYS[:self.players]:
                     if self.state == "welcome":
-                        self.state = "playing"
-                        self.pipe_timer = pygame.time.get_ticks()  # 重置管道计时器
+                        self.start_playing()
                     elif self.state == "game_over":
-                        current_camera_index = self.camera.current_camera_index
-                        self.__init__(camera_index=current_camera_index)  # 重置游戏但保留相机索引
-                        self.state = "playing"
+                        self.restart()  # 只重置对局，相机保持打开
                     elif self.state == "playing" and not self.use_gesture_control:
-                        self.bird.jump()
+                        self.jump_requested |= 1 << PLAYER_KEYS.index(event.key)
                         
                 # 按下'G'键切换手势控制模式
                 if event.key == pygame.K_g:
                     self.use_gesture_control = not self.use_gesture_control
+                    if self.camera_worker is None:
+                        if self.use_gesture_control:
+                            self.start_camera()
+                    else:
+                        self.camera_worker.set_active(self.use_gesture_control)
                     
                 # 按下'C'键切换相机
-                if event.key == pygame.K_c and self.use_gesture_control:
-                    self.camera.switch_camera()
+                if event.key == pygame.K_c and self.camera_worker is not None and self.use_gesture_control:
+                    self.camera_worker.request_switch()
+
+                # 按下'H'键显示或隐藏手部叠加层
+                if event.key == pygame.K_h:
+                    self.show_hand_overlay = not self.show_hand_overlay
+
+                # 按下'P'键显示或隐藏性能面板
+                if event.key == pygame.K_p:
+                    self.show_profiler = not self.show_profiler
+                    self.redraw_all = True
     
-    def update(self):
+    def update(self, frame_time=TICK_INTERVAL):
+        """
+        处理输入并推进模拟，frame_time 为距上一次调用的实际时间（秒）
+        物理以固定步长推进：累计的时间每满一个 TICK_INTERVAL 就模拟一个逻辑帧，
+        剩余不足一帧的部分留到下一次，并用于绘制时的插值。
+        """
         # 总是处理相机画面，无论游戏状态如何
-        if self.use_gesture_control:
+        # 相机画面由后台线程产生，这里只取最新结果，不会等待
+        if self.use_gesture_control and self.camera_worker is not None:
             try:
-                surface, jump_triggered = self.camera.capture_frame()
+                if self.camera_worker.error is not None:
+                    raise self.camera_worker.error
+                surface, jump_triggered = self.camera_worker.poll()
                 if surface is not None:
+                    if self.camera_worker.frame_id != self.camera_frame_id:
+                        self.hand_overlay.update(self.camera_worker.landmarks)
                     self.camera_surface = surface
+                    self.camera_frame_id = self.camera_worker.frame_id
                     
                     # 如果检测到手势并处于合适的游戏状态，触发相应操作
                     if jump_triggered:
                         if self.state == "welcome":
-                            self.state = "playing"
-                            self.pipe_timer = pygame.time.get_ticks()  # 重置管道计时器
+                            self.start_playing()
                         elif self.state == "game_over":
-                            current_camera_index = self.camera.current_camera_index
-                            self.__init__(camera_index=current_camera_index)
-                            self.state = "playing"
+                            self.restart()
                         elif self.state == "playing":
-                            self.bird.jump()
+                            self.jump_requested |= jump_triggered
+                            # 多次跳跃在同一逻辑帧生效时，按最早一次的画面计算延迟
+                            if self.jump_capture_time is None:
+                                self.jump_capture_time = self.camera_worker.jump_capture_time
             except Exception as e:
                 print(f"Camera error: {e}")
                 # 如果相机出错，默认切换到键盘模式
                 self.use_gesture_control = False
+                self.camera_worker.set_active(False)
                         
         if self.state == "playing":
-            self.bird.update()
-            self.background.update()
-            
-            # 生成新水管
-            current_time = pygame.time.get_ticks()
-            
-            # 开始游戏时添加初始延迟，让玩家有准备时间
-            if len(self.pipes) == 0 and current_time - self.pipe_timer < self.initial_delay:
-                pass  # 等待初始延迟
-            elif current_time - self.pipe_timer > self.pipe_frequency:
-                self.pipes.append(Pipe())
-                self.pipe_timer = current_time
-            
-            # 更新水管位置
-            for pipe in self.pipes[:]:
-                pipe.update()
-                
-                # 检测碰撞
-                if pipe.collide(self.bird.get_mask()):
-                    self.state = "game_over"
-                    hit_sound.play()
-                
-                # 检测小鸟是否通过水管
-                if not pipe.passed and pipe.x + pipe.width < self.bird.x:
-                    pipe.passed = True
-                    self.score += 1
-                    score_sound.play()
-                    
-                    # 根据分数增加难度，但管道间隔也相应增加
-                    if self.score % self.difficulty_interval == 0:
-                        self.base_speed += 0.5
-                        for p in self.pipes:
-                            p.speed = self.base_speed
-                        
-                        # 随着速度增加，适当增加水管间隔
-                        # 但最低不少于1800毫秒
-                        self.pipe_frequency = max(1800, 2500 - (self.score // self.difficulty_interval) * 100)
-                
-                # 移除超出屏幕的水管
-                if pipe.x + pipe.width < 0:
-                    self.pipes.remove(pipe)
-            
-            # 检测小鸟是否落地
-            if self.bird.y + self.bird.height >= SCREEN_HEIGHT - self.background.ground_height:
-                self.state = "game_over"
+            self.accumulator += min(frame_time, MAX_FRAME_TIME)
+            with profiler.measure("physics"):
+                while self.accumulator >= TICK_INTERVAL and self.state == "playing":
+                    self.accumulator -= TICK_INTERVAL
+                    self.step_simulation()
+
+        if self.state == "playing":
+            self.alpha = self.accumulator / TICK_INTERVAL
+        else:
+            self.accumulator = 0.0
+            self.alpha = 1.0
+
+    def step_simulation(self):
+        """推进一个逻辑帧，并播放对应的音效"""
+        # 跳跃请求在下一个逻辑帧生效，本帧没有推进模拟时会保留到之后
+        if self.recorder is not None:
+            self.recorder.record(self.sim.tick, self.jump_requested)
+        if self.jump_requested and self.jump_capture_time is not None:
+            # 手势跳跃在这一逻辑帧生效，记录从画面采集到跳跃的延迟
+            latency = time.time() - self.jump_capture_time
+            jump_latency.record(latency)
+            profiler.record("jump_latency", latency)
+            self.jump_capture_time = None
+        result = self.sim.step(self.jump_requested)
+        self.jump_requested = 0
+        self.background.update()
+
+        if result.jumped:
+            assets.sound(JUMP_SOUND).play()
+        if result.hit_pipe:
+            assets.sound(HIT_SOUND).play()
+        if result.scored:
+            assets.sound(SCORE_SOUND).play()
+        # 多人模式下坠毁的小鸟退出，所有小鸟都坠毁后游戏结束
+        if self.sim.done:
+            self.state = "game_over"
+            self.stop_recording()
     
     def draw(self):
         # 清空屏幕
         screen.fill(BLACK)
-        
+        with profiler.measure("draw.game"):
+            self.draw_game_panel(screen)
+        with profiler.measure("draw.camera"):
+            self.draw_camera_panel(screen)
+        if self.show_profiler:
+            self.profiler_hud.draw(screen)
+
+    def draw_game_panel(self, screen):
+        """绘制左侧游戏区域，各部分的耗时分别计入 draw.background、draw.bird、draw.pipes 和 draw.text"""
         # 绘制背景和地面
-        self.background.draw(screen)
+        with profiler.measure("draw.background"):
+            self.background.draw(screen, self.alpha)
         
         # 根据游戏状态绘制游戏元素（小鸟和水管），确保它们在相机区域显示之前绘制
         if self.state == "playing":
-            # 绘制小鸟
-            self.bird.draw(screen)
+            # 绘制小鸟，已坠毁的小鸟不再显示
+            with profiler.measure("draw.bird"):
+                for bird, bird_sprite in zip(self.sim.birds, self.bird_sprites):
+                    if bird.alive:
+                        bird_sprite.draw(screen, bird, self.sim.tick, self.alpha)
             
             # 绘制水管
-            for pipe in self.pipes:
-                pipe.draw(screen)
-            
-            # 绘制分数
-            font = get_font(36)
-            score_text = font.render(f"分数: {self.score}", True, BLACK)
-            screen.blit(score_text, (20, 20))
-            
-        elif self.state == "game_over":
-            font = get_font(64)
-            text = font.render("游戏结束", True, BLACK)
+            with profiler.measure("draw.pipes"):
+                for x, prev_x, top_height, bottom_height in self.sim.pipes():
+                    draw_pipe(screen, x, prev_x, top_height, bottom_height, self.alpha)
+
+        with profiler.measure("draw.text"):
+            self.draw_game_text(screen)
+        
+        # 游戏元素绘制完成后，绘制游戏区域边界
+        pygame.draw.rect(screen, BLACK, (0, 0, GAME_WIDTH, SCREEN_HEIGHT), 2)
+
+    def draw_game_text(self, screen):
+        """绘制欢迎、结束界面的文字和分数"""
+        if self.state == "game_over":
+            text = render_text("游戏结束", 64, BLACK)
             screen.blit(text, (GAME_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 - text.get_height()//2))
             
             if self.use_gesture_control:
-                restart_text = font.render("挥手重新开始", True, BLACK)
+                restart_text = render_text("挥手重新开始", 64, BLACK)
             else:
-                restart_text = font.render("按空格键重新开始", True, BLACK)
+                restart_text = render_text("按空格键重新开始", 64, BLACK)
             screen.blit(restart_text, (GAME_WIDTH//2 - restart_text.get_width()//2, SCREEN_HEIGHT//2 + 50))
             
         elif self.state == "welcome":
-            font_large = get_font(72)
-            font_small = get_font(36)
-            
-            title = font_large.render("Flappy Bird", True, BLACK)
+            title = render_text("Flappy Bird", 72, BLACK)
             if self.use_gesture_control:
-                instruction1 = font_small.render("挥手开始游戏", True, BLACK)
-                instruction2 = font_small.render("手势控制小鸟跳跃", True, BLACK)
+                instruction1 = render_text("挥手开始游戏", 36, BLACK)
+                instruction2 = render_text("手势控制小鸟跳跃", 36, BLACK)
+            elif self.players > 1:
+                instruction1 = render_text("按空格键开始游戏", 36, BLACK)
+                instruction2 = render_text("空格/回车/上方向键控制各自的小鸟", 36, BLACK)
             else:
-                instruction1 = font_small.render("按空格键开始游戏", True, BLACK)
-                instruction2 = font_small.render("空格键控制小鸟跳跃", True, BLACK)
+                instruction1 = render_text("按空格键开始游戏", 36, BLACK)
+                instruction2 = render_text("空格键控制小鸟跳跃", 36, BLACK)
             
             screen.blit(title, (GAME_WIDTH//2 - title.get_width()//2, SCREEN_HEIGHT//3))
             screen.blit(instruction1, (GAME_WIDTH//2 - instruction1.get_width()//2, SCREEN_HEIGHT//2))
             screen.blit(instruction2, (GAME_WIDTH//2 - instruction2.get_width()//2, SCREEN_HEIGHT//2 + 50))
-        
-        # 游戏元素绘制完成后，绘制游戏区域边界
-        pygame.draw.rect(screen, BLACK, (0, 0, GAME_WIDTH, SCREEN_HEIGHT), 2)
-        
+
+        # 绘制分数（有相机画面时，无论游戏状态如何都显示分数）
+        if self.state == "playing" or self.camera_surface is not None:
+            if self.players > 1:
+                # 每名玩家一行，文字颜色与小鸟颜色对应
+                for i, bird in enumerate(self.sim.birds):
+                    score_text = render_text(f"P{i + 1}: {bird.score}", 36, OVERLAY_PLAYER_COLORS[i])
+                    screen.blit(score_text, (20, 20 + i * 40))
+            else:
+                score_text = render_text(f"分数: {self.sim.score}", 36, BLACK)
+                screen.blit(score_text, (20, 20))
+
+    def draw_camera_panel(self, screen):
+        """绘制右侧相机区域"""
         # 绘制相机区域背景与边界
         pygame.draw.rect(screen, BLACK, (GAME_WIDTH, 0, CAMERA_WIDTH, SCREEN_HEIGHT))
         pygame.draw.rect(screen, BLACK, (GAME_WIDTH, 0, SCREEN_WIDTH-GAME_WIDTH, SCREEN_HEIGHT), 2)
         
-        # 如果有相机画面，显示在右侧
-        if self.camera_surface:
-            screen.blit(self.camera_surface, (GAME_WIDTH, 0))
-            
-            # 绘制说明文字
-            font_small = get_font(24)
-            font_tiny = get_font(18)
-            if self.use_gesture_control:
-                gesture_status = font_small.render("手势控制: 开启 (按G切换)", True, WHITE)
-                instruction = font_small.render("轻轻挥手触发跳跃", True, WHITE)
-                camera_info = font_small.render(f"相机索引: {self.camera.current_camera_index} (按C切换)", True, WHITE)
-                sensitivity_info = font_tiny.render("高灵敏度模式", True, (0, 255, 0))
-            else:
-                gesture_status = font_small.render("手势控制: 关闭 (按G切换)", True, WHITE)
-                instruction = font_small.render("使用空格键控制跳跃", True, WHITE)
-                camera_info = font_small.render("", True, WHITE)
-                sensitivity_info = font_tiny.render("", True, WHITE)
-                
-            # 在相机区域底部显示文字
-            screen.blit(gesture_status, (GAME_WIDTH + 10, SCREEN_HEIGHT - 120))
-            screen.blit(instruction, (GAME_WIDTH + 10, SCREEN_HEIGHT - 90))
-            screen.blit(sensitivity_info, (GAME_WIDTH + 10, SCREEN_HEIGHT - 60))
-            screen.blit(camera_info, (GAME_WIDTH + 10, SCREEN_HEIGHT - 30))
-            
-            # 绘制分数
-            font = get_font(36)
-            score_text = font.render(f"分数: {self.score}", True, BLACK)
-            screen.blit(score_text, (20, 20))
-        
-        elif self.state == "game_over":
-            font = get_font(64)
-            text = font.render("游戏结束", True, BLACK)
-            screen.blit(text, (GAME_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 - text.get_height()//2))
-            
-            if self.use_gesture_control:
-                restart_text = font.render("挥手重新开始", True, BLACK)
-            else:
-                restart_text = font.render("按空格键重新开始", True, BLACK)
-            screen.blit(restart_text, (GAME_WIDTH//2 - restart_text.get_width()//2, SCREEN_HEIGHT//2 + 50))
+        # 如果有相机画面，显示在右侧；相机仍在后台启动时显示提示
+        if self.camera_surface is not None:
+            with profiler.measure("draw.camera_frame"):
+                screen.blit(self.camera_surface, (GAME_WIDTH, 0))
+            if self.show_hand_overlay:
+                # 包含有新关键点时重新绘制叠加层的耗时
+                with profiler.measure("draw.overlay"):
+                    self.hand_overlay.draw(screen, (GAME_WIDTH, 0))
+        elif self.use_gesture_control:
+            hint = render_text("正在启动相机...", 24, WHITE)
+            screen.blit(hint, hint.get_rect(center=(GAME_WIDTH + CAMERA_WIDTH // 2, SCREEN_HEIGHT // 2)))
+
+        # 在相机区域底部显示说明文字，文字层已预先合成并缓存
+        text_layer = camera_text_layer(self.use_gesture_control, self.camera_index)
+        screen.blit(text_layer, (GAME_WIDTH, SCREEN_HEIGHT - CAMERA_TEXT_HEIGHT))
+
+# 性能面板的刷新间隔（秒），计算百分位数需要排序，不必每帧都做
+HUD_REFRESH_INTERVAL = 0.5
+# 性能面板各列的位置：阶段名称、p50、p95、p99
+HUD_COLUMNS = (10, 170, 235, 300)
+HUD_LINE_HEIGHT = 20
+
+class ProfilerHud:
+    """在游戏区域右上角显示帧率和各阶段耗时的 p50/p95/p99（毫秒）"""
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.surface = None
+        self._last_refresh = 0.0
+
+    def draw(self, screen):
+        now = time.perf_counter()
+        if self.surface is None or now - self._last_refresh >= HUD_REFRESH_INTERVAL:
+            self.surface = self.render()
+            self._last_refresh = now
+        screen.blit(self.surface, (GAME_WIDTH - self.surface.get_width() - 10, 10))
+
+    def render(self):
+        """生成面板图像，数值每次都不同，不使用文字缓存"""
+        font = get_font(18)
+        rows = [(f"FPS {clock.get_fps():.1f}", "p50", "p95", "p99")]
+        for stage, stats in self.profiler.summary():
+            rows.append((stage, f"{stats['p50_ms']:.2f}", f"{stats['p95_ms']:.2f}", f"{stats['p99_ms']:.2f}"))
+
+        surface = pygame.Surface((HUD_COLUMNS[-1] + 65, len(rows) * HUD_LINE_HEIGHT + 10), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        for i, row in enumerate(rows):
+            for x, cell in zip(HUD_COLUMNS, row):
+                surface.blit(font.render(cell, True, WHITE), (x, 5 + i * HUD_LINE_HEIGHT))
+        return surface
+
+# 相机区域底部说明文字层的高度
+CAMERA_TEXT_HEIGHT = 120
+
+@functools.lru_cache(maxsize=16)
+def camera_text_layer(use_gesture_control, camera_index):
+    """
+    生成相机区域底部的说明文字层（透明背景）
+    文字只取决于手势开关和相机索引，因此合成一次后缓存
+    """
+    layer = pygame.Surface((CAMERA_WIDTH, CAMERA_TEXT_HEIGHT), pygame.SRCALPHA)
+    if use_gesture_control:
+        gesture_status = render_text("手势控制: 开启 (按G切换)", 24, WHITE)
+        instruction = render_text("轻轻挥手触发跳跃", 24, WHITE)
+        camera_info = render_text(f"相机索引: {'-' if camera_index is None else camera_index} (按C切换)", 24, WHITE)
+        sensitivity_info = render_text("高灵敏度模式", 18, (0, 255, 0))
+    else:
+        gesture_status = render_text("手势控制: 关闭 (按G切换)", 24, WHITE)
+        instruction = render_text("使用空格键控制跳跃", 24, WHITE)
+        camera_info = render_text("", 24, WHITE)
+        sensitivity_info = render_text("", 18, WHITE)
+
+    layer.blit(gesture_status, (10, 0))
+    layer.blit(instruction, (10, 30))
+    layer.blit(sensitivity_info, (10, 60))
+    layer.blit(camera_info, (10, 90))
+    return layer
+
+class DirtyRectRenderer:
+    """
+    脏矩形渲染模式
+    只重绘发生变化的区域，并用 pygame.display.update(rects) 推送这些区域，不再每帧清屏和整屏 flip。
+    - 游戏区域：游戏进行中背景一直在滚动，整个区域每帧都会变化；
+      欢迎和结束界面是静止的，只有状态、分数或提示文字变化时才重绘
+    - 相机区域：只在收到新画面或说明文字变化时重绘
+    """
+    GAME_RECT = pygame.Rect(0, 0, GAME_WIDTH, SCREEN_HEIGHT)
+    CAMERA_RECT = pygame.Rect(GAME_WIDTH, 0, CAMERA_WIDTH, SCREEN_HEIGHT)
+
+    def __init__(self):
+        self._game_key = None
+        self._camera_key = None
+
+    def render(self, game, screen):
+        if game.redraw_all:
+            # 首帧、重新开始或窗口被遮挡后需要完整重绘
+            self._game_key = None
+            self._camera_key = None
+            game.redraw_all = False
+
+        dirty_rects = []
+
+        game_key = (game.state, game.sim.score, game.use_gesture_control, game.camera_surface is not None)
+        # 性能面板打开时数值不断变化，游戏区域每帧都要重绘
+        if game.state == "playing" or game.show_profiler or game_key != self._game_key:
+            # 限制绘制范围，超出游戏区域的背景拼接部分会被直接裁掉
+            screen.set_clip(self.GAME_RECT)
+            with profiler.measure("draw.game"):
+                game.draw_game_panel(screen)
+            if game.show_profiler:
+                game.profiler_hud.draw(screen)
+            dirty_rects.append(self.GAME_RECT)
+            self._game_key = game_key
+
+        camera_key = (game.camera_frame_id, id(game.camera_surface),
+                      game.use_gesture_control, game.camera_index, game.show_hand_overlay)
+        if camera_key != self._camera_key:
+            screen.set_clip(self.CAMERA_RECT)
+            with profiler.measure("draw.camera"):
+                game.draw_camera_panel(screen)
+            dirty_rects.append(self.CAMERA_RECT)
+            self._camera_key = camera_key
+
+        screen.set_clip(None)
+        if dirty_rects:
+            with profiler.measure("flip"):
+                pygame.display.update(dirty_rects)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Flappy Bird - 手势控制版")
+    parser.add_argument("--camera-mode", choices=["thread", "process"], default="thread",
+                        help="手势识别运行方式: thread 为后台线程, process 为独立进程 + 共享内存")
+    parser.add_argument("--flap-animation", action="store_true",
+                        help="播放小鸟扇翅动画")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="只重绘并刷新发生变化的区域，适合低性能设备")
+    parser.add_argument("--inference-width", type=int, default=None,
+                        help="手部识别输入图像的宽度，高度按相机画面比例计算（默认使用 camera.INFERENCE_WIDTH）")
+    parser.add_argument("--no-roi", action="store_true",
+                        help="跟踪到手后仍然识别整个画面，而不是只识别手部附近区域")
+    parser.add_argument("--detect-interval", type=int, default=1,
+                        help="两次完整手部识别之间最多间隔的帧数，中间帧用光流跟踪（1 表示每帧都识别）")
+    parser.add_argument("--adaptive-cadence", action="store_true",
+                        help="根据实测耗时在 1 到 --detect-interval 之间自动调整识别间隔")
+    parser.add_argument("--source", default=None,
+                        help="画面来源: 相机索引、视频文件、图片目录或 synthetic（合成画面），默认自动查找相机")
+    # 与 camera.HAND_DETECTORS 一致，这里不导入 camera 以免启动时加载 OpenCV
+    parser.add_argument("--detector", choices=("mediapipe", "marker"), default="mediapipe",
+                        help="手部检测器，marker 用于识别合成画面中的标记")
+    # 与 camera.MAX_PLAYERS 一致
+    parser.add_argument("--players", type=int, choices=(1, 2, 3), default=1,
+                        help="玩家数，多人时每人控制一只小鸟，手势模式下同一次识别检测所有玩家的手")
+    parser.add_argument("--keyboard", action="store_true",
+                        help="只用键盘游戏，启动时不打开相机（游戏中按G开启手势控制）")
+    parser.add_argument("--show-profiler", action="store_true",
+                        help="启动时显示性能面板（游戏中按P切换）")
+    parser.add_argument("--profile-output", metavar="PATH", default=None,
+                        help="退出时把各阶段耗时统计保存到该文件，扩展名为 .json 时保存为 JSON，否则为 CSV")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help="渲染帧率上限，0 表示不限制；物理始终以固定步长运行")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="水管生成的随机种子，指定后每局的水管完全相同")
+    parser.add_argument("--record", metavar="DIR", default=None,
+                        help="把每局的录像保存到该目录，可用 replay.py 回放核对")
+    return parser.parse_args()
 
 def main():
-    game = Game()
+    args = parse_args()
+    init_display()
+    assets.preload()
+    camera_options = {
+        "use_roi": not args.no_roi,
+        "detect_interval": args.detect_interval,
+        "adaptive_cadence": args.adaptive_cadence,
+        "source": args.source,
+        "hand_detector": args.detector,
+    }
+    if args.inference_width is not None:
+        camera_options["inference_width"] = args.inference_width
+    game = Game(camera_mode=args.camera_mode, flap_animation=args.flap_animation,
+                camera_options=camera_options, gesture_control=not args.keyboard,
+                seed=args.seed, record_dir=args.record, players=args.players)
+    game.show_profiler = args.show_profiler
+    renderer = DirtyRectRenderer() if args.dirty_rects else None
     
     try:
+        frame_time = TICK_INTERVAL
+        last_time = time.perf_counter()
         while True:
             game.handle_events()
-            game.update()
-            game.draw()
-            
-            pygame.display.flip()
-            clock.tick(FPS)
+            game.update(frame_time)
+            if renderer is not None:
+                renderer.render(game, screen)
+            else:
+                game.draw()
+                with profiler.measure("flip"):
+                    pygame.display.flip()
+            clock.tick(args.fps)
+
+            # 用实际经过的时间推进模拟，渲染变慢时游戏速度不变
+            now = time.perf_counter()
+            frame_time = now - last_time
+            last_time = now
     except KeyboardInterrupt:
         print("游戏被用户中断")
     finally:
-        # 确保相机资源被释放
-        game.camera.release()
+        # 确保采集线程停止、相机资源被释放
+        game.stop_camera()
+        game.stop_recording()
+        if jump_latency.count:
+            print("手势跳跃延迟（画面采集 → 小鸟跳跃）:")
+            print(jump_latency.format())
+        if args.profile_output is not None:
+            profiler.dump(args.profile_output)
+            print(f"耗时统计已保存: {args.profile_output}")
         pygame.quit()
         print("游戏结束，资源已清理")
 
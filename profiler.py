@@ -0,0 +1,145 @@
+"""
+分阶段耗时统计
+
+每个阶段（相机读取、识别、物理、绘制、刷新屏幕等）的耗时写入固定长度的环形缓冲区，
+记录一次只是一次数组赋值，开销很小，可以在正常游戏时一直开启。
+统计结果可以显示在屏幕上（p50/p95/p99），也可以在退出时保存为 CSV 或 JSON。
+LatencyHistogram 统计从挥手画面被采集到小鸟跳跃的延迟分布。
+
+用法:
+    profiler = StageProfiler()
+    with profiler.measure("physics"):
+        ...
+    profiler.record("camera.read", seconds)
+    profiler.dump("profile.csv")
+"""
+import csv
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# 每个阶段保留的最近样本数
+PROFILE_CAPACITY = 600
+PERCENTILES = (50, 95, 99)
+
+# 延迟直方图的桶宽（秒）与桶数，超出范围的样本计入最后一个桶
+LATENCY_BIN_WIDTH = 0.02
+LATENCY_BINS = 25
+# 直方图文本中最长的柱子宽度（字符）
+HISTOGRAM_BAR_WIDTH = 40
+
+
+class StageBuffer:
+    """一个阶段的耗时环形缓冲区（秒）"""
+
+    def __init__(self, capacity):
+        self.samples = np.zeros(capacity)
+        self.count = 0  # 累计记录次数
+
+    def record(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+
+    def recent(self):
+        """缓冲区中的有效样本"""
+        return self.samples[:min(self.count, len(self.samples))]
+
+
+class StageProfiler:
+    """按阶段名称记录耗时，阶段在第一次记录时自动创建，并按创建顺序显示"""
+
+    def __init__(self, capacity=PROFILE_CAPACITY):
+        self.capacity = capacity
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        buffer = self.stages.get(stage)
+        if buffer is None:
+            buffer = self.stages[stage] = StageBuffer(self.capacity)
+        buffer.record(seconds)
+
+    @contextmanager
+    def measure(self, stage):
+        """记录 with 语句块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def summary(self):
+        """
+        返回每个阶段最近样本的统计 [(阶段, {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms})]
+        count 为累计记录次数，其余统计只基于缓冲区中的最近样本
+        """
+        rows = []
+        # 复制一份，避免其他线程在遍历期间新增阶段
+        for stage, buffer in list(self.stages.items()):
+            samples = buffer.recent() * 1000
+            if len(samples) == 0:
+                continue
+            stats = {"count": buffer.count, "mean_ms": float(samples.mean())}
+            for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                stats[f"p{percentile}_ms"] = float(value)
+            stats["max_ms"] = float(samples.max())
+            rows.append((stage, stats))
+        return rows
+
+    def dump(self, path):
+        """按扩展名保存为 JSON（.json）或 CSV（其他）"""
+        rows = self.summary()
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({stage: stats for stage, stats in rows}, f, indent=2)
+            return
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            fields = ["count", "mean_ms"] + [f"p{p}_ms" for p in PERCENTILES] + ["max_ms"]
+            writer.writerow(["stage"] + fields)
+            for stage, stats in rows:
+                writer.writerow([stage] + [round(stats[field], 4) for field in fields])
+
+
+class LatencyHistogram:
+    """固定桶宽的延迟直方图，同时保留全部样本用于计算百分位数（跳跃事件很少，样本量不大）"""
+
+    def __init__(self, bin_width=LATENCY_BIN_WIDTH, num_bins=LATENCY_BINS):
+        self.bin_width = bin_width
+        self.counts = np.zeros(num_bins, dtype=np.int64)
+        self.samples = []
+
+    def record(self, seconds):
+        index = min(max(int(seconds / self.bin_width), 0), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.samples.append(seconds)
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    def percentiles(self):
+        """返回 {p50_ms, p95_ms, p99_ms}，没有样本时返回空字典"""
+        if not self.samples:
+            return {}
+        values = np.percentile(np.asarray(self.samples) * 1000, PERCENTILES)
+        return {f"p{percentile}_ms": float(value) for percentile, value in zip(PERCENTILES, values)}
+
+    def format(self):
+        """文本形式的直方图，只显示有样本的范围"""
+        if not self.samples:
+            return "没有延迟样本"
+        nonzero = np.nonzero(self.counts)[0]
+        peak = self.counts.max()
+        width_ms = self.bin_width * 1000
+        lines = []
+        for index in range(nonzero[0], nonzero[-1] + 1):
+            low = index * width_ms
+            label = f"{low:5.0f}+    ms" if index == len(self.counts) - 1 else f"{low:5.0f}-{low + width_ms:<4.0f}ms"
+            bar = "#" * int(round(self.counts[index] / peak * HISTOGRAM_BAR_WIDTH))
+            lines.append(f"{label} | {bar} {self.counts[index]}")
+        stats = self.percentiles()
+        lines.append(f"{self.count} 次, p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+                     f"p99 {stats['p99_ms']:.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,168 @@
+"""
+录像的记录与回放
+
+一局游戏完全由随机种子、模拟参数和每个逻辑帧的跳跃操作决定，
+因此录像只需要保存这三样，回放时在无界面的模拟核心中以最快速度重新模拟并核对最终分数。
+
+文件格式（小端）:
+    头部  HEADER_FORMAT: 魔数、版本号、随机种子、参数JSON长度，后接参数JSON
+    记录  RECORD_FORMAT: (类型, 逻辑帧) 序列
+          RECORD_JUMP + i 表示第 i 只小鸟在该逻辑帧跳跃（单人录像只有 RECORD_JUMP）
+          RECORD_END  表示对局在该逻辑帧结束，后接 SCORE_FORMAT 的最终分数
+没有结束记录的录像（例如中途退出游戏）仍可回放，但无法核对分数。
+
+用法:
+    python replay.py recordings/xxx.replay        # 回放并核对最终分数
+    python replay.py recordings/*.replay --info   # 只显示录像信息
+"""
+import argparse
+import json
+import random
+import struct
+import time
+
+from sim import SimConfig, Simulation
+
+MAGIC = b"FBRP"
+# 模拟规则改变时递增，旧版本的录像在新规则下无法复现
+# 2: 所有水管共享滚动速度，提升难度后新生成的水管也使用当前速度
+VERSION = 2
+HEADER_FORMAT = "<4sBQI"
+RECORD_FORMAT = "<BI"
+SCORE_FORMAT = "<I"
+
+RECORD_JUMP = 1
+RECORD_END = 0xFF
+
+
+class ReplayRecorder:
+    """边玩边把跳跃操作写入录像文件"""
+
+    def __init__(self, path, seed, config):
+        self.path = path
+        self.file = open(path, "wb")
+        config_bytes = json.dumps(config.to_dict(), sort_keys=True).encode("utf-8")
+        self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, seed, len(config_bytes)))
+        self.file.write(config_bytes)
+
+    def record(self, tick, action):
+        """记录第 tick 个逻辑帧（从0开始）的操作，只有跳跃需要写入，action 为跳跃的小鸟的位掩码"""
+        if not action or self.file is None:
+            return
+        action = int(action)
+        player = 0
+        while action:
+            if action & 1:
+                self.file.write(struct.pack(RECORD_FORMAT, RECORD_JUMP + player, tick))
+            action >>= 1
+            player += 1
+
+    def finish(self, tick, score):
+        """写入结束记录并关闭文件"""
+        if self.file is None:
+            return
+        self.file.write(struct.pack(RECORD_FORMAT, RECORD_END, tick))
+        self.file.write(struct.pack(SCORE_FORMAT, score))
+        self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Replay:
+    """从文件读取的一局录像"""
+
+    def __init__(self, seed, config, jump_ticks, jump_players, end_tick=None, score=None):
+        self.seed = seed
+        self.config = config
+        self.jump_ticks = jump_ticks  # 跳跃的逻辑帧，升序
+        self.jump_players = jump_players  # 每次跳跃的小鸟编号，与 jump_ticks 一一对应
+        self.end_tick = end_tick  # 对局结束时的逻辑帧数，未正常结束时为 None
+        self.score = score  # 最终分数，未正常结束时为 None
+
+    @property
+    def complete(self):
+        return self.end_tick is not None
+
+
+def load_replay(path):
+    """读取录像文件，格式不正确时抛出 ValueError"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    header_size = struct.calcsize(HEADER_FORMAT)
+    if len(data) < header_size:
+        raise ValueError(f"录像文件过短: {path}")
+    magic, version, seed, config_size = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != MAGIC:
+        raise ValueError(f"不是录像文件: {path}")
+    if version != VERSION:
+        raise ValueError(f"不支持的录像版本 {version}: {path}")
+    offset = header_size
+    config = SimConfig(**json.loads(data[offset:offset + config_size].decode("utf-8")))
+    offset += config_size
+
+    record_size = struct.calcsize(RECORD_FORMAT)
+    jump_ticks = []
+    jump_players = []
+    while offset + record_size <= len(data):
+        kind, tick = struct.unpack_from(RECORD_FORMAT, data, offset)
+        offset += record_size
+        if RECORD_JUMP <= kind < RECORD_JUMP + config.num_birds:
+            jump_ticks.append(tick)
+            jump_players.append(kind - RECORD_JUMP)
+        elif kind == RECORD_END:
+            (score,) = struct.unpack_from(SCORE_FORMAT, data, offset)
+            return Replay(seed, config, jump_ticks, jump_players, tick, score)
+        else:
+            raise ValueError(f"未知的记录类型 {kind}: {path}")
+    return Replay(seed, config, jump_ticks, jump_players)
+
+
+def simulate(replay):
+    """在模拟核心中重新运行录像，返回结束时的 Simulation"""
+    sim = Simulation(replay.config, random.Random(replay.seed))
+    # 每个逻辑帧跳跃的小鸟位掩码
+    jumps = {}
+    for tick, player in zip(replay.jump_ticks, replay.jump_players):
+        jumps[tick] = jumps.get(tick, 0) | 1 << player
+    last_tick = replay.end_tick if replay.complete else max(replay.jump_ticks, default=-1) + 1
+    while not sim.done and sim.tick < last_tick:
+        sim.step(jumps.get(sim.tick, 0))
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放录像并核对最终分数")
+    parser.add_argument("paths", nargs="+", help="录像文件")
+    parser.add_argument("--info", action="store_true", help="只显示录像信息，不回放")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.paths:
+        replay = load_replay(path)
+        if args.info:
+            end = f"{replay.end_tick} 帧结束, 分数 {replay.score}" if replay.complete else "未正常结束"
+            print(f"{path}: 种子 {replay.seed}, 跳跃 {len(replay.jump_ticks)} 次, {end}")
+            continue
+
+        start = time.perf_counter()
+        sim = simulate(replay)
+        elapsed = time.perf_counter() - start
+        speed = f"{sim.tick / elapsed:,.0f} 步/秒" if elapsed > 0 else ""
+        if not replay.complete:
+            print(f"{path}: 未正常结束，回放到第 {sim.tick} 帧，分数 {sim.score} {speed}")
+        elif sim.done and sim.tick == replay.end_tick and sim.score == replay.score:
+            print(f"{path}: 一致，{sim.tick} 帧，分数 {sim.score} {speed}")
+        else:
+            failed += 1
+            print(f"{path}: 不一致！录像 {replay.end_tick} 帧分数 {replay.score}，"
+                  f"回放 {sim.tick} 帧分数 {sim.score}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Flappy Bird 的纯逻辑模拟核心
+
+负责小鸟物理、水管生成、碰撞检测、计分和难度递增，不依赖 pygame、相机或声音，
+可以在没有显示器的服务器上以每秒数千步以上的速度运行，用于平衡性测试和机器人评估。
+游戏窗口（game.py）在此之上负责绘制、声音和输入。
+
+时间以逻辑帧（tick）为单位推进，每秒 TICKS_PER_SECOND 帧，
+配置中以毫秒表示的时间间隔按逻辑帧换算，因此结果与实际帧率无关。
+
+用法:
+    python sim.py --episodes 1000   # 用随机策略测试模拟速度
+"""
+import argparse
+import math
+import random
+import time
+
+# 游戏区域尺寸，与 game.py 保持一致
+GAME_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+# 每秒逻辑帧数
+TICKS_PER_SECOND = 60
+
+
+class SimConfig:
+    """模拟参数，可以通过关键字参数覆盖默认值"""
+
+    def __init__(self, **overrides):
+        # 小鸟
+        self.bird_x = 200
+        self.bird_width = 40
+        self.bird_height = 30
+        self.gravity = 0.8
+        self.jump_strength = -12
+        self.max_angle = 30  # 最大旋转角度
+        self.min_angle = -90  # 最小旋转角度
+        self.rotation_speed = 5  # 旋转速度
+
+        # 水管
+        self.gap = 300  # 上下水管之间的空隙
+        self.pipe_width = 80
+        self.pipe_speed = 4  # 新生成水管的移动速度
+        self.pipe_margin = 50  # 水管最短长度
+        self.pipe_frequency = 6000  # 毫秒，水管生成间隔
+        self.initial_delay = 1000  # 开始游戏后延迟一段时间再生成第一个水管
+
+        # 难度递增
+        self.base_speed = 4  # 基础速度
+        self.speed_step = 0.5  # 每次提升难度增加的速度
+        self.difficulty_interval = 5  # 每5分增加难度
+        self.ramp_pipe_frequency = 2500  # 提升难度后的水管生成间隔基准（毫秒）
+        self.pipe_frequency_step = 100  # 每提升一级缩短的间隔（毫秒）
+        self.min_pipe_frequency = 1800  # 水管生成间隔下限（毫秒）
+
+        # 地面高度，由前端根据地面图像设置
+        self.ground_height = 112
+
+        # 同一片水管中同时飞行的小鸟数量（多人模式）
+        self.num_birds = 1
+
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise TypeError(f"未知的模拟参数: {name}")
+            setattr(self, name, value)
+
+        # 水管槽位数按最低速度和最短间隔计算（见 pipe_capacity），速度只能随难度上升
+        for name in ("pipe_speed", "base_speed", "pipe_frequency", "min_pipe_frequency"):
+            if getattr(self, name) <= 0:
+                raise ValueError(f"模拟参数 {name} 必须大于0: {getattr(self, name)}")
+        if self.speed_step < 0:
+            raise ValueError(f"模拟参数 speed_step 不能为负数: {self.speed_step}")
+        for name in ("bird_width", "bird_height", "pipe_width", "gap"):
+            if getattr(self, name) <= 0:
+                raise ValueError(f"模拟参数 {name} 必须大于0: {getattr(self, name)}")
+        if self.pipe_margin < 0:
+            raise ValueError(f"模拟参数 pipe_margin 不能为负数: {self.pipe_margin}")
+        # 上下水管都至少有 pipe_margin 长，否则无法生成水管高度
+        if SCREEN_HEIGHT - self.gap - 2 * self.pipe_margin < 0:
+            raise ValueError(f"模拟参数 gap + 2 * pipe_margin 不能超过屏幕高度 {SCREEN_HEIGHT}: "
+                             f"gap={self.gap}, pipe_margin={self.pipe_margin}")
+        if self.difficulty_interval < 1:
+            raise ValueError(f"模拟参数 difficulty_interval 必须至少为1: {self.difficulty_interval}")
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def rects_overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    """与 pygame.Rect.colliderect 相同的整数矩形相交判断（边缘相接不算相交）"""
+    if aw <= 0 or ah <= 0 or bw <= 0 or bh <= 0:
+        return False
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+class Bird:
+    """小鸟的物理状态"""
+
+    def __init__(self, config):
+        self.config = config
+        self.x = config.bird_x
+        self.y = SCREEN_HEIGHT // 2
+        self.prev_y = self.y  # 上一逻辑帧的位置，供绘制时插值
+        self.width = config.bird_width
+        self.height = config.bird_height
+        self.velocity = 0
+        self.angle = 0  # 旋转角度
+        self.alive = True
+        self.score = 0  # 这只小鸟通过的水管数
+
+    def jump(self):
+        self.velocity = self.config.jump_strength
+        self.angle = self.config.max_angle  # 跳跃时向上旋转
+
+    def update(self):
+        config = self.config
+        self.prev_y = self.y
+        # 应用重力
+        self.velocity += config.gravity
+        self.y += self.velocity
+
+        # 更新旋转角度
+        if self.velocity < 0:  # 上升时
+            self.angle = min(config.max_angle, self.angle + config.rotation_speed)
+        else:  # 下降时
+            self.angle = max(config.min_angle, self.angle - config.rotation_speed)
+
+        # 防止小鸟飞出屏幕顶部
+        if self.y < 0:
+            self.y = 0
+            self.velocity = 0
+
+    def get_rect(self):
+        """碰撞矩形 (x, y, w, h)，与 pygame.Rect 一样截断为整数"""
+        return int(self.x), int(self.y), self.width, self.height
+
+
+def pipe_capacity(config):
+    """同时存在的水管数量上限"""
+    # 水管从右边界移动到完全离开左边界所需的最长时间，除以最短生成间隔
+    travel_ms = (GAME_WIDTH + config.pipe_width) / min(config.pipe_speed, config.base_speed) \
+        * 1000 / TICKS_PER_SECOND
+    min_interval = min(config.pipe_frequency, config.min_pipe_frequency)
+    return math.ceil(travel_ms / min_interval) + 1
+
+
+class StepResult:
+    """一步模拟中发生的事件，前端据此播放音效；多只小鸟时为所有小鸟事件的汇总"""
+
+    def __init__(self):
+        self.jumped = False
+        self.scored = 0  # 本步得分
+        self.hit_pipe = False
+        self.hit_ground = False
+
+    @property
+    def crashed(self):
+        """本步是否有小鸟坠毁"""
+        return self.hit_pipe or self.hit_ground
+
+
+class Simulation:
+    """
+    一局游戏的完整逻辑状态
+    每次调用 step(action) 推进一个逻辑帧，action 为真时小鸟在这一帧开始前跳跃。
+    config.num_birds 大于1时多只小鸟共享同一片水管，action 为跳跃的小鸟的位掩码（第 i 位对应第 i 只），
+    坠毁的小鸟退出，全部坠毁时对局结束；score 为本局通过的水管数，同时决定难度，
+    bird.score 只计入通过时仍存活的小鸟。
+    """
+
+    def __init__(self, config=None, rng=None):
+        self.config = config or SimConfig()
+        self.rng = rng or random
+        self.reset()
+
+    def reset(self):
+        config = self.config
+        self.birds = [Bird(config) for _ in range(config.num_birds)]
+        self.bird = self.birds[0]
+        self.score = 0
+        self.tick = 0
+        self.done = False
+        self.pipe_timer = 0  # 上次生成水管的时间（毫秒）
+        self.pipe_frequency = config.pipe_frequency
+        self.base_speed = config.base_speed
+
+        # 所有水管以相同速度移动，位置由共同的滚动距离决定：x = GAME_WIDTH - (scroll - 生成时的scroll)，
+        # 提升难度只需修改 scroll_speed。
+        # 水管按生成顺序存放在固定容量的环形缓冲区中，第 n 个生成的水管位于槽位 n % capacity，
+        # 先生成的水管总是先被通过、先离开屏幕，因此只需要三个序号:
+        # pipe_head 之前的已移除，pipe_next 之前的已通过，pipe_end 之前的已生成
+        self.scroll = 0.0
+        self.prev_scroll = 0.0  # 上一逻辑帧的滚动距离，供绘制时插值
+        self.scroll_speed = config.pipe_speed
+        self.pipe_capacity = pipe_capacity(config)
+        self.pipe_offset = [0.0] * self.pipe_capacity  # 生成时的滚动距离
+        self.pipe_top = [0] * self.pipe_capacity  # 上方水管高度
+        self.pipe_head = 0
+        self.pipe_next = 0
+        self.pipe_end = 0
+
+    @property
+    def time_ms(self):
+        """模拟时间（毫秒）"""
+        return self.tick * 1000 / TICKS_PER_SECOND
+
+    def pipe_x(self, index):
+        """第 index 个生成的水管的左边缘位置"""
+        return GAME_WIDTH - (self.scroll - self.pipe_offset[index % self.pipe_capacity])
+
+    def step(self, action=False):
+        """推进一个逻辑帧，返回 StepResult"""
+        result = StepResult()
+        if self.done:
+            return result
+        config = self.config
+
+        birds = [bird for bird in self.birds if bird.alive]
+        for index, bird in enumerate(self.birds):
+            if bird.alive and int(action) >> index & 1:
+                bird.jump()
+                result.jumped = True
+        for bird in birds:
+            bird.update()
+        self.tick += 1
+
+        # 生成新水管
+        current_time = self.time_ms
+        # 开始游戏时添加初始延迟，让玩家有准备时间
+        if self.pipe_head == self.pipe_end and current_time - self.pipe_timer < config.initial_delay:
+            pass  # 等待初始延迟
+        elif current_time - self.pipe_timer > self.pipe_frequency:
+            if self.pipe_end - self.pipe_head >= self.pipe_capacity:
+                raise RuntimeError("水管槽位不足")
+            slot = self.pipe_end % self.pipe_capacity
+            self.pipe_offset[slot] = self.scroll
+            self.pipe_top[slot] = self.rng.randint(config.pipe_margin, SCREEN_HEIGHT - config.gap - config.pipe_margin)
+            self.pipe_end += 1
+            self.pipe_timer = current_time
+
+        # 所有水管一起移动
+        self.prev_scroll = self.scroll
+        self.scroll += self.scroll_speed
+
+        # 只检查小鸟附近的水管：尚未通过、且左边缘在小鸟右边缘之前的水管（通常只有一个）
+        # 所有小鸟的水平位置相同
+        bird_right = int(config.bird_x) + config.bird_width
+        index = self.pipe_next
+        while index < self.pipe_end:
+            x = int(self.pipe_x(index))
+            if x >= bird_right:
+                break
+            top = self.pipe_top[index % self.pipe_capacity]
+            bottom_height = SCREEN_HEIGHT - top - config.gap
+            for bird in birds:
+                bx, by, bw, bh = bird.get_rect()
+                if (rects_overlap(bx, by, bw, bh, x, 0, config.pipe_width, top) or
+                        rects_overlap(bx, by, bw, bh, x, SCREEN_HEIGHT - bottom_height, config.pipe_width,
+                                      bottom_height)):
+                    bird.alive = False
+                    result.hit_pipe = True
+            index += 1
+
+        # 检测小鸟是否落地
+        for bird in birds:
+            if bird.y + bird.height >= SCREEN_HEIGHT - config.ground_height:
+                bird.alive = False
+                result.hit_ground = True
+
+        # 检测小鸟是否通过水管，本帧已坠毁的小鸟不再得分
+        while self.pipe_next < self.pipe_end and self.pipe_x(self.pipe_next) + config.pipe_width < config.bird_x:
+            self.pipe_next += 1
+            self.score += 1
+            result.scored += 1
+            for bird in birds:
+                if bird.alive:
+                    bird.score += 1
+
+            # 根据分数增加难度，但管道间隔也相应增加
+            if self.score % config.difficulty_interval == 0:
+                self.base_speed += config.speed_step
+                self.scroll_speed = self.base_speed
+
+                # 随着速度增加，适当调整水管间隔，但不低于下限
+                self.pipe_frequency = max(
+                    config.min_pipe_frequency,
+                    config.ramp_pipe_frequency - (self.score // config.difficulty_interval) * config.pipe_frequency_step,
+                )
+
+        # 移除超出屏幕的水管
+        while self.pipe_head < self.pipe_next and self.pipe_x(self.pipe_head) + config.pipe_width < 0:
+            self.pipe_head += 1
+
+        if not any(bird.alive for bird in self.birds):
+            self.done = True
+        return result
+
+    def pipes(self):
+        """
+        依次返回当前每对水管的 (x, 上一逻辑帧的x, 上方水管高度, 下方水管高度)，供绘制使用
+        """
+        gap = self.config.gap
+        for index in range(self.pipe_head, self.pipe_end):
+            slot = index % self.pipe_capacity
+            offset = self.pipe_offset[slot]
+            top = self.pipe_top[slot]
+            # 本帧刚生成的水管 offset 等于 prev_scroll，上一帧位于右边界
+            yield (GAME_WIDTH - (self.scroll - offset), GAME_WIDTH - (self.prev_scroll - offset),
+                   top, SCREEN_HEIGHT - top - gap)
+
+    def observation(self):
+        """
+        供机器人使用的观测值:
+        (小鸟y, 小鸟速度, 到下一对水管的水平距离, 空隙上沿, 空隙下沿)
+        前方没有水管时距离为游戏区域宽度，空隙为整个屏幕
+        """
+        if self.pipe_next == self.pipe_end:
+            return self.bird.y, self.bird.velocity, GAME_WIDTH, 0, SCREEN_HEIGHT
+        top = self.pipe_top[self.pipe_next % self.pipe_capacity]
+        return (self.bird.y, self.bird.velocity, self.pipe_x(self.pipe_next) - self.bird.x,
+                top, top + self.config.gap)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面运行模拟，测试模拟速度")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--jump-probability", type=float, default=0.05,
+                        help="随机策略每帧跳跃的概率")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sim = Simulation(rng=rng)
+    steps = 0
+    total_score = 0
+    start = time.perf_counter()
+    for _ in range(args.episodes):
+        sim.reset()
+        while not sim.done:
+            sim.step(rng.random() < args.jump_probability)
+            steps += 1
+        total_score += sim.score
+    elapsed = time.perf_counter() - start
+    print(f"{args.episodes} 局, {steps} 步, 平均得分 {total_score / args.episodes:.2f}, "
+          f"{steps / elapsed:,.0f} 步/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+机器人锦标赛
+
+把大量带种子的对局分组后交给 ProcessPoolExecutor，在各个工作进程中以最快速度运行无界面的模拟核心，
+统计控制器在不同难度参数下的分数分布、存活时间以及每个工作进程的模拟速度，结果保存到一个 JSON 文件。
+每组对局只传递种子和参数，工作进程之间不共享任何状态，速度随核心数近似线性增长。
+
+控制器只需要提供两个方法:
+    reset(config, seed)   每局开始前调用，config 为 SimConfig
+    act(observation)      返回本逻辑帧是否跳跃，observation 见 Simulation.observation()
+内置控制器见 CONTROLLERS，也可以用 "模块:类名" 指定自己的控制器（例如训练好的模型）。
+
+用法:
+    python tournament.py --controller heuristic --episodes 2000
+    python tournament.py --controller random --set gap=200,250,300 --output results.json
+    python tournament.py --controller mybot:Bot --set pipe_frequency=4000 --set base_speed=4,5 --workers 8
+"""
+import argparse
+import importlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from sim import SCREEN_HEIGHT, TICKS_PER_SECOND, SimConfig, Simulation
+
+# 随机控制器每帧跳跃的概率，与 sim.py 的默认值一致
+RANDOM_JUMP_PROBABILITY = 0.05
+# 启发式控制器让小鸟底部与空隙下沿（或地面）保持的距离
+HEURISTIC_MARGIN = 20
+# 单局最长模拟时间（秒），超过后按存活结束，防止强控制器无限运行
+MAX_EPISODE_SECONDS = 600
+# 每个工作进程平均分到的任务组数，组数越多负载越均衡，但进程间通信越多
+CHUNKS_PER_WORKER = 8
+# 结果文件中统计的百分位数
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class RandomController:
+    """每帧以固定概率跳跃"""
+
+    def __init__(self, probability=RANDOM_JUMP_PROBABILITY):
+        self.probability = probability
+        self.rng = random.Random()
+
+    def reset(self, config, seed):
+        # 与模拟核心使用不同的随机序列
+        self.rng.seed(f"{seed}:controller")
+
+    def act(self, observation):
+        return self.rng.random() < self.probability
+
+
+class HeuristicController:
+    """小鸟下落到空隙下沿附近时跳跃，前方没有水管时以地面为准"""
+
+    def __init__(self, margin=HEURISTIC_MARGIN):
+        self.margin = margin
+        self.bird_height = 0
+        self.floor = SCREEN_HEIGHT
+
+    def reset(self, config, seed):
+        self.bird_height = config.bird_height
+        self.floor = SCREEN_HEIGHT - config.ground_height
+
+    def act(self, observation):
+        y, velocity, _, _, gap_bottom = observation
+        limit = min(gap_bottom, self.floor) - self.margin
+        return velocity >= 0 and y + self.bird_height + velocity > limit
+
+
+# 内置控制器
+CONTROLLERS = {
+    "random": RandomController,
+    "heuristic": HeuristicController,
+}
+
+
+def load_controller(spec):
+    """按名称创建内置控制器，或从 "模块:类名" 导入控制器类并创建实例"""
+    if spec in CONTROLLERS:
+        return CONTROLLERS[spec]()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"未知的控制器 {spec}，可选 {', '.join(CONTROLLERS)} 或 模块:类名")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def run_chunk(controller_spec, overrides, seeds, max_ticks):
+    """
+    在工作进程中运行一组对局
+    返回 (进程号, 每局的分数, 每局存活的逻辑帧数, 模拟步数, 耗时秒数)
+    """
+    controller = load_controller(controller_spec)
+    config = SimConfig(**overrides)
+    scores = []
+    ticks = []
+    steps = 0
+    start = time.perf_counter()
+    for seed in seeds:
+        # 与游戏相同：每局一个独立的随机数生成器，同一种子总能得到相同的水管
+        sim = Simulation(config, random.Random(seed))
+        controller.reset(config, seed)
+        step = sim.step
+        observation = sim.observation
+        act = controller.act
+        while not sim.done and sim.tick < max_ticks:
+            step(act(observation()))
+        scores.append(sim.score)
+        ticks.append(sim.tick)
+        steps += sim.tick
+    return os.getpid(), scores, ticks, steps, time.perf_counter() - start
+
+
+def parse_settings(assignments):
+    """
+    把 --set name=v1,v2 解析为参数组合列表，多个取值的参数做笛卡尔积
+    取值按 JSON 解析，例如 gap=250 或 pipe_frequency=4000,6000
+    """
+    names = []
+    choices = []
+    for assignment in assignments:
+        name, sep, values = assignment.partition("=")
+        if not sep or not values:
+            raise ValueError(f"参数格式应为 name=value[,value...]: {assignment}")
+        names.append(name)
+        choices.append([json.loads(value) for value in values.split(",")])
+    settings = [dict(zip(names, combination)) for combination in itertools.product(*choices)]
+    for overrides in settings:
+        SimConfig(**overrides)  # 参数名不存在时抛出 TypeError，取值无效时抛出 ValueError
+    return settings
+
+
+def distribution(values):
+    """数值分布的统计量"""
+    values = np.asarray(values, dtype=np.float64)
+    stats = {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f"p{p}"] = float(value)
+    return stats
+
+
+def run_tournament(controller_spec, settings, episodes, seed, workers, chunk_size, max_ticks):
+    """在进程池中运行所有参数组合下的对局，返回写入结果文件的字典"""
+    seeds = [seed + i for i in range(episodes)]
+    chunks = [seeds[i:i + chunk_size] for i in range(0, episodes, chunk_size)]
+    results = [{"scores": [None] * episodes, "ticks": [None] * episodes} for _ in settings]
+    worker_stats = {}
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for setting_index, overrides in enumerate(settings):
+            for chunk_index, chunk in enumerate(chunks):
+                future = executor.submit(run_chunk, controller_spec, overrides, chunk, max_ticks)
+                futures[future] = (setting_index, chunk_index * chunk_size)
+        for future in as_completed(futures):
+            setting_index, offset = futures[future]
+            pid, scores, ticks, steps, seconds = future.result()
+            result = results[setting_index]
+            result["scores"][offset:offset + len(scores)] = scores
+            result["ticks"][offset:offset + len(ticks)] = ticks
+            stats = worker_stats.setdefault(pid, {"episodes": 0, "steps": 0, "seconds": 0.0})
+            stats["episodes"] += len(scores)
+            stats["steps"] += steps
+            stats["seconds"] += seconds
+    wall_seconds = time.perf_counter() - start
+
+    total_steps = 0
+    for stats in worker_stats.values():
+        stats["steps_per_second"] = stats["steps"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+        total_steps += stats["steps"]
+
+    setting_results = []
+    for overrides, result in zip(settings, results):
+        scores = result["scores"]
+        ticks = result["ticks"]
+        setting_results.append({
+            "overrides": overrides,
+            "score": distribution(scores),
+            "score_histogram": np.bincount(scores).tolist(),  # 第 i 项为得到 i 分的局数
+            "survival_seconds": distribution(np.asarray(ticks) / TICKS_PER_SECOND),
+            "timeouts": sum(tick >= max_ticks for tick in ticks),  # 达到时间上限仍存活的局数
+            "scores": scores,
+            "survival_ticks": ticks,
+        })
+
+    return {
+        "controller": controller_spec,
+        "episodes": episodes,
+        "seed": seed,
+        "max_ticks": max_ticks,
+        "workers": len(worker_stats),
+        "wall_seconds": wall_seconds,
+        "steps": total_steps,
+        "steps_per_second": total_steps / wall_seconds if wall_seconds > 0 else 0.0,
+        "worker_stats": [dict(pid=pid, **stats) for pid, stats in sorted(worker_stats.items())],
+        "settings": setting_results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在多个进程中并行评估控制器")
+    parser.add_argument("--controller", default="heuristic",
+                        help=f"控制器: {', '.join(CONTROLLERS)} 或 模块:类名")
+    parser.add_argument("--episodes", type=int, default=1000, help="每组参数的对局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子，之后依次加一")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUES",
+                        help="覆盖模拟参数，多个取值用逗号分隔，可重复使用，所有取值组合都会评估")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="工作进程数")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="每个任务包含的对局数，默认按工作进程数自动计算")
+    parser.add_argument("--max-seconds", type=float, default=MAX_EPISODE_SECONDS,
+                        help="单局最长的游戏时间（秒）")
+    parser.add_argument("--output", default="tournament.json", help="结果文件 (JSON)")
+    args = parser.parse_args()
+
+    if args.episodes < 1:
+        parser.error("--episodes 必须至少为1")
+    if args.workers < 1:
+        parser.error("--workers 必须至少为1")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size 必须至少为1")
+    try:
+        load_controller(args.controller)
+        settings = parse_settings(args.set)
+    except (ValueError, TypeError, ImportError, AttributeError) as e:
+        parser.error(str(e))
+    chunk_size = args.chunk_size
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(args.episodes / (args.workers * CHUNKS_PER_WORKER)))
+    max_ticks = int(args.max_seconds * TICKS_PER_SECOND)
+
+    results = run_tournament(args.controller, settings, args.episodes, args.seed, args.workers,
+                             chunk_size, max_ticks)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"控制器 {args.controller}, 每组 {args.episodes} 局, {results['workers']} 个工作进程, "
+          f"用时 {results['wall_seconds']:.2f} 秒, 共 {results['steps_per_second']:,.0f} 步/秒")
+    for stats in results["worker_stats"]:
+        print(f"  进程 {stats['pid']}: {stats['episodes']} 局, {stats['steps_per_second']:,.0f} 步/秒")
+    for setting in results["settings"]:
+        overrides = ", ".join(f"{name}={value}" for name, value in setting["overrides"].items()) or "默认参数"
+        score = setting["score"]
+        survival = setting["survival_seconds"]
+        print(f"{overrides}: 分数 平均 {score['mean']:.2f} p50 {score['p50']:.0f} p95 {score['p95']:.0f} "
+              f"最高 {score['max']:.0f}, 存活 p50 {survival['p50']:.1f} 秒, 超时 {setting['timeouts']} 局")
+    print(f"结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()